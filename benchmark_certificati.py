@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+"""
+Benchmark del convertitore certificati (converti_certificati_pdf.py).
+
+Genera un corpus sintetico di certificati nel formato esatto di certifica.pas
+e misura separatamente le fasi di ricerca cartella, diagnostica, lettura e
+impaginazione e il tempo di avvio fino alla prima domanda, registrando tempo e memoria di picco in un file JSON
+confrontabile tra versioni diverse. Con --check-memory verifica che la memoria di
+picco della conversione in streaming non cresca con il numero di certificati; con
+--check-startup che l'avvio resti nel limite senza importare le librerie PDF.
+"""
+
+import sys
+import json
+import random
+import argparse
+import platform
+import subprocess
+import time
+import io
+import contextlib
+from pathlib import Path
+from datetime import datetime
+
+import converti_certificati_pdf as converter
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+STAGES = ['startup', 'discovery', 'diagnose', 'read', 'render', 'stream']
+
+# Controllo di memoria (--check-memory): corpus piccolo e grande e crescita massima
+# ammessa del picco tra i due (MB): copre l'elenco ordinato dei file, che cresce col corpus
+MEMORY_CHECK_SIZES = [1000, 100000]
+MEMORY_CHECK_TOLERANCE_MB = 16
+
+# Avvio a freddo: tempo dal lancio del convertitore alla prima domanda all'utente
+STARTUP_PROMPT = b"Vuoi eseguire la diagnostica completa?"
+STARTUP_RUNS = 5
+STARTUP_BUDGET_MS = 500
+STARTUP_CHECK_SIZE = 10
+# Librerie caricate solo al momento della conversione: non devono rallentare l'avvio
+DEFERRED_MODULES = ('reportlab', 'pypdf')
+
+# Percentuale di file volutamente corrotti nel corpus
+CORRUPT_RATIO = 0.01
+
+# Sotto questa durata le differenze di tempo sono rumore e non vengono segnalate
+MIN_COMPARABLE_DURATION = 0.05
+
+PART_TYPES = ['Resistor', 'Capacitor', 'Inductor', 'Diode', 'LED', 'Transistor NPN',
+              'MOSFET N-Channel', 'Connettore', 'Quarzo', 'Microcontrollore']
+FOOTPRINTS = ['0402', '0603', '0805', '1206', 'SOT-23', 'SOIC-8', 'QFN-32', 'TQFP-44', 'THT-2P']
+VALUES = ['10k', '4.7k', '100nF', '10uF', '1uH', '470R', '22pF', '1M', '']
+DESIGNATOR_PREFIXES = {'Resistor': 'R', 'Capacitor': 'C', 'Inductor': 'L', 'Diode': 'D', 'LED': 'D',
+                       'Transistor NPN': 'Q', 'MOSFET N-Channel': 'Q', 'Connettore': 'J',
+                       'Quarzo': 'Y', 'Microcontrollore': 'U'}
+
+def generate_certificate_content(project_name, project_path, date, part_type, value, footprint,
+                                 description, first_designator, quantity):
+    """Riproduce il testo di GeneratePDFContent in certifica.pas (fine riga CRLF)."""
+    separator = '=' * 48
+    lines = [
+        'CERTIFICATO COMPONENTE',
+        '',
+        separator,
+        'INFORMAZIONI PROGETTO:',
+        f'  Nome: {project_name}',
+        f'  Percorso: {project_path}',
+        f'  Data Creazione: {date}',
+        f'  Data Certificazione: {date}',
+        '',
+        'INFORMAZIONI COMPONENTE:',
+        f'  Tipo: {part_type}',
+        f'  Valore: {value}',
+        f'  Footprint: {footprint}',
+        f'  Descrizione: {description}',
+        f'  Primo Designatore: {first_designator}',
+        f'  Quantità nel Progetto: {quantity}',
+        '',
+        'CERTIFICAZIONE:',
+        '  Certificato da: Certificatore Altium',
+        f'  Data: {date}',
+        '',
+        separator,
+        'Questo certificato attesta la presenza e le',
+        'caratteristiche del componente nel progetto.',
+        separator,
+    ]
+    return '\r\n'.join(lines)
+
+def corrupt_certificate_bytes(rng, data):
+    """Restituisce una versione corrotta di un certificato (vuoto, binario, senza header, righe lunghe)."""
+    kind = rng.choice(['empty', 'binary', 'no_header', 'long_line'])
+    if kind == 'empty':
+        return b''
+    if kind == 'binary':
+        return bytes(rng.randrange(256) for _ in range(512))
+    if kind == 'no_header':
+        return data.replace(b'CERTIFICATO COMPONENTE', b'DOCUMENTO', 1)
+    return data + b'\r\n' + b'X' * 1500
+
+def generate_corpus(corpus_root, size, seed=42):
+    """Genera un workspace con un progetto Altium e 'size' certificati nella cartella Certificati.
+    
+    Il workspace contiene anche cartelle da ignorare (.git, History, librerie) per rendere
+    realistica la fase di ricerca. Un corpus già generato con gli stessi parametri viene riusato.
+    """
+    workspace = Path(corpus_root) / f"corpus_{size}"
+    marker = workspace / 'corpus.json'
+    corpus_info = {'size': size, 'seed': seed, 'format': 1}
+    
+    if marker.exists():
+        try:
+            if json.loads(marker.read_text(encoding='utf-8')) == corpus_info:
+                return workspace
+        except Exception:
+            pass
+    
+    rng = random.Random(seed)
+    project_name = f"Progetto_{size}"
+    project_dir = workspace / 'Clienti' / 'Demo' / project_name
+    certificates_folder = project_dir / 'Certificati'
+    certificates_folder.mkdir(parents=True, exist_ok=True)
+    
+    # Cartelle che la ricerca deve saltare
+    for noise in ['.git/objects/00', 'History/backup', 'Libraries/Componenti/Resistori', 'Altro/Documenti']:
+        (workspace / noise).mkdir(parents=True, exist_ok=True)
+    
+    project_path = f"C:\\Progetti\\Clienti\\Demo\\{project_name}"
+    date = '18/10/2026'
+    
+    for index in range(size):
+        part_type = rng.choice(PART_TYPES)
+        description = f"{part_type.split()[0].upper()}_{index:06d}"
+        content = generate_certificate_content(
+            project_name, project_path, date, part_type, rng.choice(VALUES), rng.choice(FOOTPRINTS),
+            description, f"{DESIGNATOR_PREFIXES[part_type]}{rng.randint(1, 999)}", rng.randint(1, 50))
+        
+        # Metà dei file in UTF-8, metà in cp1252 come li scrive Altium su Windows
+        data = content.encode('utf-8' if rng.random() < 0.5 else 'cp1252')
+        if rng.random() < CORRUPT_RATIO:
+            data = corrupt_certificate_bytes(rng, data)
+        
+        (certificates_folder / f"{description}_Certificato.txt").write_bytes(data)
+    
+    marker.write_text(json.dumps(corpus_info), encoding='utf-8')
+    return workspace
+
+def peak_memory_mb():
+    """Restituisce la memoria di picco del processo corrente in MB."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Su macOS il valore è in byte, su Linux in KB
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+def measure_startup(project_root, runs=STARTUP_RUNS):
+    """Lancia il convertitore e misura il tempo fino alla prima domanda; restituisce la mediana in secondi."""
+    command = [sys.executable, str(Path(converter.__file__).absolute())]
+    durations = []
+    
+    for _ in range(runs):
+        start_time = time.perf_counter()
+        process = subprocess.Popen(command, cwd=project_root, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.DEVNULL)
+        output = b''
+        try:
+            while STARTUP_PROMPT not in output:
+                chunk = process.stdout.read1(4096)
+                if not chunk:
+                    break
+                output += chunk
+            duration = time.perf_counter() - start_time
+        finally:
+            process.kill()
+            process.wait()
+        
+        if STARTUP_PROMPT not in output:
+            raise RuntimeError("il convertitore è terminato prima della domanda sulla diagnostica")
+        durations.append(duration)
+    
+    durations.sort()
+    return durations[len(durations) // 2]
+
+def run_stage(stage, workspace, renderer):
+    """Esegue una singola fase sul corpus e restituisce (durata, numero di file elaborati)."""
+    certificates_folder = next(Path(workspace).glob('Clienti/*/*/Certificati'))
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        start_time = time.perf_counter()
+        
+        if stage == 'startup':
+            duration = measure_startup(certificates_folder.parent)
+            processed = STARTUP_RUNS
+        elif stage == 'discovery':
+            found = converter.find_certificates_folder(workspace, use_cache=False)
+            processed = 1 if found else 0
+        elif stage == 'diagnose':
+            processed = len(converter.diagnose_files(certificates_folder))
+        elif stage == 'read':
+            certificate_files = converter.get_certificate_files(certificates_folder)
+            for cert_file in certificate_files:
+                converter.read_certificate_content(cert_file)
+            processed = len(certificate_files)
+        elif stage == 'render':
+            certificate_files = converter.get_certificate_files(certificates_folder)
+            output_path = Path(workspace) / 'benchmark_output.pdf'
+            converter.create_unified_pdf(certificate_files, output_path, renderer=renderer)
+            processed = len(certificate_files)
+            output_path.unlink(missing_ok=True)
+        elif stage == 'stream':
+            output_path = Path(workspace) / 'benchmark_output.pdf'
+            stats = {}
+            converter.create_streaming_pdf(certificates_folder, output_path, renderer=renderer, stats=stats)
+            processed = stats.get('successful', 0)
+            output_path.unlink(missing_ok=True)
+        else:
+            raise ValueError(f"Fase sconosciuta: {stage}")
+        
+        if stage != 'startup':
+            duration = time.perf_counter() - start_time
+    
+    return duration, processed
+
+def run_stage_isolated(stage, workspace, renderer):
+    """Esegue una fase in un processo separato, così memoria e cache non si sommano tra le fasi."""
+    command = [sys.executable, str(Path(__file__).absolute()), '--run-stage', stage,
+               '--workspace', str(workspace), '--renderer', renderer]
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "errore sconosciuto")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def get_git_revision():
+    """Restituisce il commit corrente del repository (se disponibile)."""
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).parent)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
+
+def run_benchmark(sizes, stages, corpus_root, renderer):
+    """Genera i corpus ed esegue tutte le fasi, restituendo il risultato complessivo."""
+    results = []
+    
+    for size in sizes:
+        print(f"\nCorpus da {size} certificati")
+        start_time = time.perf_counter()
+        workspace = generate_corpus(corpus_root, size)
+        print(f"  Corpus pronto in {time.perf_counter() - start_time:.1f}s: {workspace}")
+        
+        for stage in stages:
+            try:
+                measure = run_stage_isolated(stage, workspace, renderer)
+            except Exception as e:
+                print(f"  {stage:<10} ERRORE: {e}")
+                results.append({'size': size, 'stage': stage, 'error': str(e)})
+                continue
+            
+            measure.update(size=size, stage=stage)
+            measure['files_per_s'] = round(measure['processed'] / measure['duration_s'], 1) if measure['duration_s'] else None
+            results.append(measure)
+            print(f"  {stage:<10} {measure['duration_s']:>9.3f}s  picco {measure['peak_memory_mb']:>8.1f} MB"
+                  f"  ({measure['processed']} file)")
+    
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'revision': get_git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'renderer': renderer,
+        'results': results,
+    }
+
+def check_streaming_memory(corpus_root, renderer, sizes=MEMORY_CHECK_SIZES,
+                           tolerance_mb=MEMORY_CHECK_TOLERANCE_MB):
+    """Verifica che il picco di memoria della conversione in streaming resti piatto.
+    
+    Converte i corpus delle due dimensioni in processi separati e confronta i picchi;
+    restituisce True se la crescita non supera tolerance_mb.
+    """
+    print(f"\nControllo memoria in streaming: {sizes[0]} e {sizes[1]} certificati (motore: {renderer})")
+    peaks = []
+    for size in sizes:
+        workspace = generate_corpus(corpus_root, size)
+        measure = run_stage_isolated('stream', workspace, renderer)
+        if measure['processed'] == 0:
+            raise RuntimeError(f"nessun certificato convertito nel corpus da {size}")
+        peaks.append(measure['peak_memory_mb'])
+        print(f"  {size:>7} certificati: picco {measure['peak_memory_mb']:.1f} MB in {measure['duration_s']:.1f}s")
+    
+    growth = peaks[1] - peaks[0]
+    if growth > tolerance_mb:
+        print(f"ERRORE: la memoria cresce di {growth:.1f} MB (limite {tolerance_mb} MB)")
+        return False
+    print(f"OK: crescita di {growth:.1f} MB (limite {tolerance_mb} MB)")
+    return True
+
+def find_eager_imports(modules=DEFERRED_MODULES):
+    """Importa il convertitore in un processo pulito e restituisce le librerie già caricate."""
+    code = ("import json, sys, converti_certificati_pdf\n"
+            f"modules = {tuple(modules)!r}\n"
+            "print(json.dumps(sorted({name.split('.')[0] for name in sys.modules} & set(modules))))")
+    result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                            cwd=Path(converter.__file__).absolute().parent)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "import fallito")
+    return json.loads(result.stdout)
+
+def check_startup(corpus_root, budget_ms=STARTUP_BUDGET_MS, size=STARTUP_CHECK_SIZE):
+    """Verifica che l'import non carichi le librerie PDF e che l'avvio resti entro budget_ms.
+    
+    Restituisce True se entrambi i controlli sono superati.
+    """
+    print(f"\nControllo avvio: limite {budget_ms:.0f} ms, corpus da {size} certificati")
+    passed = True
+    
+    eager = find_eager_imports()
+    if eager:
+        print(f"ERRORE: librerie caricate già all'import: {', '.join(eager)}")
+        passed = False
+    else:
+        print(f"  Import: nessuna tra {', '.join(DEFERRED_MODULES)} caricata")
+    
+    workspace = generate_corpus(corpus_root, size)
+    certificates_folder = next(Path(workspace).glob('Clienti/*/*/Certificati'))
+    duration_ms = measure_startup(certificates_folder.parent) * 1000
+    if duration_ms > budget_ms:
+        print(f"ERRORE: avvio in {duration_ms:.0f} ms (limite {budget_ms:.0f} ms)")
+        passed = False
+    else:
+        print(f"  Avvio: {duration_ms:.0f} ms (limite {budget_ms:.0f} ms)")
+    
+    print("OK: avvio nel limite" if passed else "Controllo avvio fallito")
+    return passed
+
+def compare_results(current, baseline, threshold):
+    """Confronta due risultati e restituisce l'elenco delle regressioni oltre la soglia (in %)."""
+    baseline_index = {(r['size'], r['stage']): r for r in baseline.get('results', []) if 'error' not in r}
+    regressions = []
+    
+    print(f"\nConfronto con {baseline.get('revision') or 'baseline'} (soglia {threshold:.0f}%)")
+    for result in current['results']:
+        previous = baseline_index.get((result['size'], result['stage']))
+        if 'error' in result or not previous:
+            continue
+        for metric in ('duration_s', 'peak_memory_mb'):
+            if not previous[metric]:
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric] * 100
+            flag = ''
+            too_short = metric == 'duration_s' and max(result[metric], previous[metric]) < MIN_COMPARABLE_DURATION
+            if change > threshold and not too_short:
+                flag = '  REGRESSIONE'
+                regressions.append((result['size'], result['stage'], metric, change))
+            print(f"  {result['size']:>7} {result['stage']:<10} {metric:<15} "
+                  f"{previous[metric]:>10.3f} -> {result[metric]:>10.3f} ({change:+6.1f}%){flag}")
+    
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del convertitore certificati TXT a PDF.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help=f"Numero di certificati per corpus (default: {' '.join(map(str, DEFAULT_SIZES))})")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES,
+                        help="Fasi da misurare (default: tutte)")
+    parser.add_argument('--corpus-dir', default=str(Path.cwd() / 'benchmark_corpus'),
+                        help="Cartella in cui generare (e riusare) i corpus sintetici")
+    parser.add_argument('--renderer', choices=sorted(converter.RENDERERS), default='platypus',
+                        help="Motore di impaginazione per la fase render (default: platypus)")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="File JSON dei risultati (default: benchmark_results.json)")
+    parser.add_argument('--compare', metavar='FILE',
+                        help="File JSON di una esecuzione precedente con cui confrontare i risultati")
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_MS, metavar='MS',
+                        help="Tempo massimo di avvio fino alla prima domanda, in millisecondi: se superato "
+                             f"il benchmark termina con errore (default: {STARTUP_BUDGET_MS})")
+    parser.add_argument('--check-memory', action='store_true',
+                        help="Esegue solo il controllo di memoria della conversione in streaming e termina "
+                             "con errore se il picco cresce con il numero di certificati")
+    parser.add_argument('--memory-sizes', type=int, nargs=2, default=MEMORY_CHECK_SIZES, metavar=('PICCOLO', 'GRANDE'),
+                        help=f"Corpus del controllo di memoria (default: {' '.join(map(str, MEMORY_CHECK_SIZES))})")
+    parser.add_argument('--check-startup', action='store_true',
+                        help="Esegue solo il controllo dell'avvio (librerie PDF non importate e tempo entro "
+                             "--startup-budget) e termina con errore se non è superato")
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help="Peggioramento percentuale oltre il quale segnalare una regressione (default: 10)")
+    # Uso interno: esecuzione di una singola fase in un processo separato
+    parser.add_argument('--run-stage', choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument('--workspace', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.run_stage:
+        duration, processed = run_stage(args.run_stage, args.workspace, args.renderer)
+        print(json.dumps({'duration_s': round(duration, 4), 'processed': processed,
+                          'peak_memory_mb': round(peak_memory_mb(), 1)}))
+        return 0
+    
+    if args.check_memory:
+        return 0 if check_streaming_memory(args.corpus_dir, args.renderer, args.memory_sizes) else 1
+    if args.check_startup:
+        return 0 if check_startup(args.corpus_dir, args.startup_budget) else 1
+    
+    print("BENCHMARK CONVERTITORE CERTIFICATI")
+    current = run_benchmark(args.sizes, args.stages, args.corpus_dir, args.renderer)
+    
+    Path(args.output).write_text(json.dumps(current, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"\nRisultati salvati in: {args.output}")
+    
+    # Un avvio non misurabile (convertitore terminato prima della domanda) conta come fallito
+    slow_startups = [r for r in current['results']
+                     if r['stage'] == 'startup' and ('error' in r or r['duration_s'] * 1000 > args.startup_budget)]
+    for result in slow_startups:
+        if 'error' in result:
+            print(f"Avvio non riuscito con {result['size']} certificati: {result['error']}")
+        else:
+            print(f"Avvio oltre il limite con {result['size']} certificati: "
+                  f"{result['duration_s'] * 1000:.0f} ms > {args.startup_budget:.0f} ms")
+    if slow_startups:
+        return 1
+    
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        regressions = compare_results(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regressioni oltre la soglia del {args.threshold:.0f}%")
+            return 1
+        print("\nNessuna regressione rilevata.")
+    
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
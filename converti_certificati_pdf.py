@@ -8,48 +8,183 @@ Ogni certificato diventa una pagina del PDF finale.
 
 import os
 import sys
+import codecs
+import mmap
+import argparse
+import itertools
+import json
+import hashlib
+import glob
+import fnmatch
+import time
+import io
+import csv
+import contextlib
+import collections
+import functools
 from pathlib import Path
 from datetime import datetime
 
-def install_required_packages():
-    """Installa i pacchetti necessari se non sono presenti."""
-    required_packages = ['reportlab']
+# Cache persistente: "interprete|pacchetto" -> file del modulo trovato all'ultimo controllo
+DEPENDENCY_CACHE_PATH = Path.home() / '.converti_certificati_dipendenze.json'
+
+def probe_package(package, cache):
+    """Verifica che un pacchetto sia installato senza importarlo.
+    
+    Se la cache indica un file del modulo ancora esistente basta un solo stat;
+    altrimenti il pacchetto viene cercato con importlib e la cache aggiornata.
+    """
+    import importlib.util
+    
+    key = f"{sys.executable}|{package}"
+    origin = cache.get(key)
+    if origin and os.path.exists(origin):
+        return True
+    
+    spec = importlib.util.find_spec(package)
+    if spec is None:
+        return False
+    cache[key] = spec.origin
+    return True
+
+def install_required_packages(required_packages=None):
+    """Installa i pacchetti necessari se non sono presenti.
+    
+    I pacchetti non vengono importati: vengono caricati solo quando inizia l'impaginazione.
+    """
+    if required_packages is None:
+        required_packages = ['reportlab']
+    
+    try:
+        with open(DEPENDENCY_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except Exception:
+        cache = {}
+    cache_before = dict(cache)
     
     for package in required_packages:
-        try:
-            __import__(package)
+        if probe_package(package, cache):
             print(f"{package} già installato")
-        except ImportError:
-            print(f"Installazione di {package}...")
-            try:
-                import subprocess
-                result = subprocess.run([sys.executable, "-m", "pip", "install", package], 
-                                      capture_output=True, text=True)
-                if result.returncode == 0:
-                    print(f"{package} installato")
-                else:
-                    print(f"Errore nell'installazione di {package}: {result.stderr}")
-                    return False
-            except Exception as e:
-                print(f"Errore durante l'installazione di {package}: {e}")
+            continue
+        
+        print(f"Installazione di {package}...")
+        try:
+            import subprocess
+            import importlib
+            result = subprocess.run([sys.executable, "-m", "pip", "install", package], 
+                                  capture_output=True, text=True)
+            importlib.invalidate_caches()
+            if result.returncode == 0 and probe_package(package, cache):
+                print(f"{package} installato")
+            else:
+                print(f"Errore nell'installazione di {package}: {result.stderr}")
                 return False
+        except Exception as e:
+            print(f"Errore durante l'installazione di {package}: {e}")
+            return False
+    
+    if cache != cache_before:
+        try:
+            temp_path = DEPENDENCY_CACHE_PATH.with_suffix('.tmp')
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, ensure_ascii=False, indent=1)
+            os.replace(temp_path, DEPENDENCY_CACHE_PATH)
+        except Exception:
+            pass
     return True
 
-def find_certificates_folder():
+# Cartelle mai esplorate durante la ricerca della cartella Certificati (pattern fnmatch)
+DISCOVERY_IGNORED_DIRS = [
+    '.*', '__pycache__', 'node_modules', 'venv', 'env',
+    'History', '__Previews', 'Project Logs for *', 'Project Outputs for *',
+    'build', 'dist', 'Libraries', 'Library',
+]
+DISCOVERY_MAX_DEPTH = 4
+
+# Cache persistente: cartella di partenza -> cartella Certificati trovata
+DISCOVERY_CACHE_PATH = Path.home() / '.converti_certificati_cartelle.json'
+
+def load_discovery_cache():
+    """Carica la cache delle cartelle Certificati già trovate."""
+    try:
+        with open(DISCOVERY_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except Exception:
+        return {}
+
+def save_discovery_cache(cache):
+    """Salva la cache delle cartelle Certificati (errori ignorati)."""
+    try:
+        temp_path = DISCOVERY_CACHE_PATH.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, DISCOVERY_CACHE_PATH)
+    except Exception:
+        pass
+
+def is_ignored_dir(name, ignore_patterns):
+    """Verifica se una cartella va esclusa dalla ricerca."""
+    return any(fnmatch.fnmatch(name, pattern) for pattern in ignore_patterns)
+
+def scan_for_certificates_folder(root_dir, max_depth=DISCOVERY_MAX_DEPTH, ignore_patterns=None):
+    """Cerca la cartella Certificati in ampiezza, livello per livello, fermandosi alla prima trovata.
+    
+    Le cartelle che corrispondono a ignore_patterns e i link simbolici non vengono esplorati;
+    la ricerca non scende oltre max_depth livelli sotto root_dir.
+    """
+    if ignore_patterns is None:
+        ignore_patterns = DISCOVERY_IGNORED_DIRS
+    
+    current_level = [root_dir]
+    for depth in range(max_depth + 1):
+        next_level = []
+        for directory in current_level:
+            try:
+                with os.scandir(directory) as entries:
+                    subdirs = sorted(entry.name for entry in entries if entry.is_dir(follow_symlinks=False))
+            except OSError:
+                continue
+            
+            if "Certificati" in subdirs:
+                return Path(directory) / "Certificati"
+            
+            if depth < max_depth:
+                next_level.extend(Path(directory) / name for name in subdirs
+                                  if not is_ignored_dir(name, ignore_patterns))
+        
+        if not next_level:
+            break
+        current_level = next_level
+    
+    return None
+
+def find_certificates_folder(start_dir=None, max_depth=DISCOVERY_MAX_DEPTH, ignore_patterns=None, use_cache=True):
     """Trova la cartella Certificati nel progetto."""
     # Cerca nella directory corrente
-    current_dir = Path.cwd()
+    current_dir = Path(start_dir or Path.cwd()).resolve()
     certificates_folder = current_dir / "Certificati"
     
     if certificates_folder.exists():
         return certificates_folder
     
-    # Cerca nelle sottocartelle (caso in cui lo script sia eseguito da una sottocartella)
-    for root, dirs, files in os.walk(current_dir):
-        if "Certificati" in dirs:
-            return Path(root) / "Certificati"
+    # Percorso già trovato in precedenza: basta verificare che esista ancora
+    cache = load_discovery_cache() if use_cache else {}
+    cached_folder = cache.get(str(current_dir))
+    if cached_folder and Path(cached_folder).is_dir():
+        return Path(cached_folder)
     
-    return None
+    # Cerca nelle sottocartelle (caso in cui lo script sia eseguito da una cartella superiore)
+    certificates_folder = scan_for_certificates_folder(current_dir, max_depth, ignore_patterns)
+    
+    if use_cache:
+        if certificates_folder:
+            cache[str(current_dir)] = str(certificates_folder)
+        else:
+            cache.pop(str(current_dir), None)
+        save_discovery_cache(cache)
+    
+    return certificates_folder
 
 def get_manual_certificates_folder():
     """Permette all'utente di inserire manualmente il percorso della cartella certificati."""
@@ -112,8 +247,11 @@ def get_manual_certificates_folder():
             if retry != 's':
                 return None
 
-def diagnose_files(certificates_folder):
-    """Esegue una diagnostica completa sui file nella cartella certificati."""
+def diagnose_files(certificates_folder, jobs=1):
+    """Esegue una diagnostica completa sui file nella cartella certificati.
+    
+    Con jobs > 1 l'analisi dei file viene eseguita in parallelo su più processi.
+    """
     print("\n" + "="*60)
     print("DIAGNOSTICA FILE CERTIFICATI")
     print("="*60)
@@ -125,6 +263,8 @@ def diagnose_files(certificates_folder):
     # Trova tutti i file nella cartella
     all_files = list(certificates_folder.iterdir())
     txt_files = [f for f in all_files if f.suffix.lower() == '.txt']
+    # Ordina alfabeticamente per avere lo stesso ordine della conversione
+    txt_files.sort(key=lambda x: x.name.lower())
     
     print(f"Cartella analizzata: {certificates_folder}")
     print(f"File totali nella cartella: {len(all_files)}")
@@ -139,10 +279,16 @@ def diagnose_files(certificates_folder):
     valid_files = []
     files_with_warnings = []
     
-    for i, file_path in enumerate(txt_files, 1):
+    jobs = resolve_jobs(jobs)
+    if jobs > 1:
+        print(f"Analisi parallela con {jobs} processi")
+        print()
+    
+    records = load_certificates(txt_files, jobs)
+    for i, (file_path, record) in enumerate(zip(txt_files, records), 1):
         print(f"[{i}/{len(txt_files)}] Analisi: {file_path.name}")
-        file_issues = analyze_single_file(file_path)
-        encoding_info = get_file_encoding_info(file_path)
+        file_issues = record['issues']
+        encoding_info = record['encoding']
         
         if file_issues:
             problematic_files.append((file_path, file_issues))
@@ -151,7 +297,7 @@ def diagnose_files(certificates_folder):
                 print(f"     - {issue}")
         else:
             valid_files.append(file_path)
-            if encoding_info and encoding_info != 'utf-8':
+            if encoding_info and encoding_info not in ('utf-8', 'utf-8-sig'):
                 files_with_warnings.append((file_path, f"Encoding: {encoding_info}"))
                 print(f"  OK - File valido (encoding: {encoding_info})")
             else:
@@ -179,33 +325,205 @@ def diagnose_files(certificates_folder):
     print()
     return valid_files
 
-def get_file_encoding_info(file_path):
-    """Restituisce l'encoding rilevato per un file."""
-    encodings_to_try = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'ascii']
+# Encoding provati in ordine durante la decodifica dei certificati
+ENCODINGS_TO_TRY = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'ascii']
+
+# Cache dei certificati già letti: percorso -> record decodificato
+_certificate_cache = {}
+
+# Oltre questa dimensione il file viene segnalato e letto tramite memory-map
+LARGE_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+MAX_LINE_LENGTH = 1000
+MMAP_CHUNK_SIZE = 1024 * 1024
+
+# Caratteri di controllo considerati non stampabili (tutti tranne \t \n \r)
+CONTROL_BYTES = bytes(b for b in range(32) if b not in (9, 10, 13))
+CONTROL_CHARS_TABLE = dict.fromkeys(CONTROL_BYTES)
+
+def decode_certificate_bytes(data):
+    """Decodifica i byte di un certificato e restituisce (testo, encoding)."""
+    encodings_to_try = ENCODINGS_TO_TRY
+    # Se è presente il BOM UTF-8 lo rimuoviamo subito invece di lasciarlo nel testo
+    if data[:3] == codecs.BOM_UTF8:
+        encodings_to_try = ['utf-8-sig'] + [e for e in ENCODINGS_TO_TRY if e != 'utf-8-sig']
     
     for encoding in encodings_to_try:
         try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                f.read()
-                return encoding
+            # str() decodifica direttamente anche da un memory-map, senza copie intermedie
+            text = str(data, encoding)
         except UnicodeDecodeError:
             continue
-        except Exception:
-            continue
+        # Stessa normalizzazione dei fine riga della lettura in modalità testo
+        if '\r' in text:
+            text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return text, encoding
     
-    return None
+    return None, None
 
-def analyze_single_file(file_path):
-    """Analizza un singolo file e restituisce una lista di problemi."""
+def count_control_bytes(data):
+    """Conta i caratteri di controllo non stampabili direttamente sui byte.
+    
+    Negli encoding gestiti (UTF-8, latin1, cp1252, ascii) i byte < 32 corrispondono
+    uno a uno ai caratteri < 32, quindi il conteggio coincide con quello sul testo.
+    """
+    if isinstance(data, bytes):
+        return len(data) - len(data.translate(None, CONTROL_BYTES))
+    
+    # Memory-map: elabora a blocchi per non copiare tutto il file in memoria
+    count = 0
+    for offset in range(0, len(data), MMAP_CHUNK_SIZE):
+        chunk = data[offset:offset + MMAP_CHUNK_SIZE]
+        count += len(chunk) - len(chunk.translate(None, CONTROL_BYTES))
+    return count
+
+def read_certificate_bytes(record, data):
+    """Completa il record con hash, caratteri di controllo, testo ed encoding."""
+    record['hash'] = hashlib.sha256(data).hexdigest()
+    record['control_chars'] = count_control_bytes(data)
+    record['text'], record['encoding'] = decode_certificate_bytes(data)
+
+def load_certificate(file_path, use_cache=True):
+    """Legge un certificato una sola volta e restituisce il record decodificato.
+    
+    Il record contiene percorso, dimensione, hash del contenuto, encoding, testo e problemi rilevati.
+    I record vengono riutilizzati finché dimensione e data di modifica non cambiano;
+    con use_cache=False il record non viene conservato (conversione in streaming).
+    """
+    file_path = Path(file_path)
+    record = {
+        'path': file_path,
+        'size': 0,
+        'mtime': None,
+        'hash': None,
+        'control_chars': None,
+        'encoding': None,
+        'text': None,
+        'issues': [],
+    }
+    
+    try:
+        stat = file_path.stat()
+    except Exception as e:
+        record['issues'].append(f"Errore generale nell'analisi: {str(e)}")
+        return record
+    
+    cache_key = str(file_path)
+    cached = _certificate_cache.get(cache_key) if use_cache else None
+    if cached and cached['size'] == stat.st_size and cached['mtime'] == stat.st_mtime_ns:
+        return cached
+    
+    record['size'] = stat.st_size
+    record['mtime'] = stat.st_mtime_ns
+    
+    try:
+        with open(file_path, 'rb') as f:
+            if stat.st_size > LARGE_FILE_SIZE:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    read_certificate_bytes(record, data)
+            else:
+                read_certificate_bytes(record, f.read())
+    except Exception as e:
+        record['issues'].append(f"Errore lettura: {str(e)}")
+    
+    record['issues'].extend(validate_certificate(record))
+    if use_cache:
+        _certificate_cache[cache_key] = record
+    return record
+
+def clear_certificate_cache():
+    """Svuota la cache dei certificati letti."""
+    _certificate_cache.clear()
+
+def resolve_jobs(jobs):
+    """Converte il numero di processi richiesto (0 o negativo = tutti i core)."""
+    if not jobs or jobs < 1:
+        return os.cpu_count() or 1
+    return jobs
+
+def load_certificates(file_paths, jobs=1):
+    """Carica i certificati restituendo i record nello stesso ordine dei percorsi.
+    
+    Con jobs > 1 la lettura e la validazione vengono distribuite su un pool di processi;
+    i record ottenuti vengono comunque salvati nella cache del processo principale.
+    """
+    if jobs <= 1 or len(file_paths) < 2:
+        for file_path in file_paths:
+            yield load_certificate(file_path)
+        return
+    
+    from concurrent.futures import ProcessPoolExecutor
+    
+    # Blocchi abbastanza grandi da ammortizzare il costo di comunicazione tra processi
+    chunksize = max(1, len(file_paths) // (jobs * 16))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        for record in executor.map(load_certificate, file_paths, chunksize=chunksize):
+            _certificate_cache[str(record['path'])] = record
+            yield record
+
+# Lettura anticipata durante l'impaginazione: certificati in lettura o in attesa e thread lettori
+PREFETCH_DEPTH = 16
+PREFETCH_READERS = 4
+
+def take_certificate(file_path):
+    """Restituisce il record di un certificato togliendolo dalla cache.
+    
+    Il record già letto (es. dalla diagnostica) viene riutilizzato e rimosso; gli
+    altri vengono letti senza essere conservati.
+    """
+    cache_key = str(file_path)
+    if cache_key in _certificate_cache:
+        record = load_certificate(file_path)
+        _certificate_cache.pop(cache_key, None)
+        return record
+    return load_certificate(file_path, use_cache=False)
+
+def prefetch_certificates(file_paths, depth=PREFETCH_DEPTH, readers=PREFETCH_READERS):
+    """Carica i certificati in anticipo con un pool di thread, nello stesso ordine dei percorsi.
+    
+    Mentre il chiamante impagina un certificato, i thread leggono e decodificano i
+    successivi: su dischi di rete o OneDrive l'attesa dell'I/O si sovrappone al lavoro
+    della CPU. Al massimo depth record sono in lettura o pronti in coda e i record
+    letti non restano nella cache (vedi take_certificate), quindi la memoria usata
+    dalla lettura resta limitata anche con migliaia di file; i record già in cache
+    vengono riutilizzati e liberati man mano. Con depth = 0 la lettura torna sequenziale.
+    """
+    if depth <= 0:
+        for file_path in file_paths:
+            yield take_certificate(file_path)
+        return
+    
+    from concurrent.futures import ThreadPoolExecutor
+    
+    file_iter = iter(file_paths)
+    pending = collections.deque()
+    with ThreadPoolExecutor(max_workers=max(1, min(readers, depth))) as executor:
+        for file_path in itertools.islice(file_iter, depth):
+            pending.append(executor.submit(take_certificate, file_path))
+        
+        while pending:
+            record = pending.popleft().result()
+            # Un posto libero in coda: avvia subito la lettura del prossimo file
+            next_path = next(file_iter, None)
+            if next_path is not None:
+                pending.append(executor.submit(take_certificate, next_path))
+            yield record
+
+def get_file_encoding_info(file_path):
+    """Restituisce l'encoding rilevato per un file."""
+    return load_certificate(file_path)['encoding']
+
+def validate_certificate(record):
+    """Controlla un record decodificato e restituisce una lista di problemi."""
     issues = []
+    file_path = record['path']
     
     try:
         # 1. Controllo dimensione file
-        file_size = file_path.stat().st_size
+        file_size = record['size']
         if file_size == 0:
             issues.append("File vuoto (0 bytes)")
             return issues
-        elif file_size > 10 * 1024 * 1024:  # 10MB
+        elif file_size > LARGE_FILE_SIZE:
             issues.append(f"File molto grande ({file_size/1024/1024:.1f}MB)")
         
         # 2. Controllo caratteri nel nome file
@@ -214,41 +532,28 @@ def analyze_single_file(file_path):
         if any(char in filename for char in problematic_chars):
             issues.append("Nome file contiene caratteri problematici")
         
-        # 3. Tentativo di lettura con diversi encoding
-        content = None
-        encoding_used = None
-        
-        encodings_to_try = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252', 'ascii']
-        
-        for encoding in encodings_to_try:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                    encoding_used = encoding
-                    break
-            except UnicodeDecodeError:
-                continue
-            except Exception as e:
-                issues.append(f"Errore lettura con {encoding}: {str(e)}")
-        
+        # 3. Il testo è già stato decodificato da load_certificate
+        content = record['text']
         if content is None:
             issues.append("Impossibile leggere il file con nessun encoding")
             return issues
         
         # 4. Analisi contenuto
-        if not content.strip():
+        if not content or content.isspace():
             issues.append("File vuoto o solo spazi bianchi")
         
-        # 5. Controllo caratteri non stampabili
-        non_printable = sum(1 for c in content if ord(c) < 32 and c not in '\r\n\t')
+        # 5. Controllo caratteri non stampabili (già contati sui byte da load_certificate)
+        non_printable = record.get('control_chars')
+        if non_printable is None:
+            non_printable = len(content) - len(content.translate(CONTROL_CHARS_TABLE))
         if non_printable > 0:
             issues.append(f"Contiene {non_printable} caratteri non stampabili")
         
-        # 6. Controllo lunghezza righe eccessive
-        lines = content.split('\n')
-        long_lines = [i for i, line in enumerate(lines, 1) if len(line) > 1000]
-        if long_lines:
-            issues.append(f"Righe molto lunghe: {len(long_lines)} righe > 1000 caratteri")
+        # 6. Controllo lunghezza righe eccessive (solo se il testo può contenerne)
+        if len(content) > MAX_LINE_LENGTH:
+            long_lines = sum(1 for line in content.split('\n') if len(line) > MAX_LINE_LENGTH)
+            if long_lines:
+                issues.append(f"Righe molto lunghe: {long_lines} righe > {MAX_LINE_LENGTH} caratteri")
         
         # 7. Controllo encoding effettivo usato (solo come avviso, non come errore bloccante)
         # Rimosso perché il sistema può gestire encoding multipli
@@ -262,213 +567,2200 @@ def analyze_single_file(file_path):
     
     return issues
 
-def get_certificate_files(certificates_folder):
-    """Ottiene tutti i file .txt dalla cartella certificati."""
+def analyze_single_file(file_path):
+    """Analizza un singolo file e restituisce una lista di problemi."""
+    return list(load_certificate(file_path)['issues'])
+
+def iter_certificate_files(certificates_folder):
+    """Restituisce i file .txt della cartella certificati uno alla volta, in ordine alfabetico.
+    
+    In memoria vengono tenuti solo i nomi dei file, necessari per l'ordinamento.
+    """
     if not certificates_folder or not certificates_folder.exists():
-        return []
+        return
     
-    txt_files = list(certificates_folder.glob("*.txt"))
+    with os.scandir(certificates_folder) as entries:
+        names = [entry.name for entry in entries
+                 if entry.name.lower().endswith('.txt') and entry.is_file()]
     # Ordina alfabeticamente per avere un ordine consistente
-    txt_files.sort(key=lambda x: x.name.lower())
+    names.sort(key=str.lower)
     
-    return txt_files
+    for name in names:
+        yield certificates_folder / name
+
+def get_certificate_files(certificates_folder):
+    """Ottiene tutti i file .txt dalla cartella certificati."""
+    return list(iter_certificate_files(certificates_folder))
 
 def read_certificate_content(file_path):
     """Legge il contenuto di un file certificato con gestione migliorata degli encoding."""
-    encodings_to_try = ['utf-8', 'utf-8-sig', 'latin1', 'cp1252']
+    record = load_certificate(file_path)
+    content = record['text']
     
-    for encoding in encodings_to_try:
-        try:
-            with open(file_path, 'r', encoding=encoding) as file:
-                content = file.read()
-                # Rimuovi caratteri non stampabili eccetto \r\n\t
-                content = ''.join(c for c in content if ord(c) >= 32 or c in '\r\n\t')
-                return content
-        except UnicodeDecodeError:
-            continue
-        except Exception as e:
-            print(f"Errore nella lettura di {file_path} con encoding {encoding}: {e}")
-            continue
+    if content is None:
+        print(f"Errore: Impossibile leggere {file_path} con nessun encoding")
+        return f"Errore nella lettura del file: {Path(file_path).name}"
     
-    # Se tutti gli encoding falliscono
-    print(f"Errore: Impossibile leggere {file_path} con nessun encoding")
-    return f"Errore nella lettura del file: {file_path.name}"
+    return clean_certificate_text(content)
 
-def create_unified_pdf(certificate_files, output_path):
-    """Crea un PDF unificato con tutti i certificati."""
-    try:
-        from reportlab.lib.pagesizes import A4
-        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        
-        # Crea il documento PDF
-        doc = SimpleDocTemplate(str(output_path), pagesize=A4)
-        story = []
-        styles = getSampleStyleSheet()
-        
-        # Stile personalizzato per il titolo
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            textColor=colors.darkblue,
-            alignment=1  # Centro
-        )
-        
-        # Stile per il contenuto
-        content_style = ParagraphStyle(
-            'CustomContent',
-            parent=styles['Normal'],
-            fontSize=10,
-            fontName='Courier',  # Font monospace per mantenere formattazione
-            spaceAfter=12,
-            leftIndent=20,
-            rightIndent=20
-        )
-        
-        print(f"Creazione PDF con {len(certificate_files)} certificati...")
-        
-        successful_conversions = 0
-        failed_conversions = 0
+def clean_certificate_text(content):
+    """Rimuove i caratteri non stampabili eccetto \r\n\t."""
+    return content.translate(CONTROL_CHARS_TABLE)
+
+# Profili di output del PDF:
+# - page_compression: compressione zlib dei contenuti di pagina (ReportLab)
+# - dedupe_objects: riscrive il PDF con pypdf unificando gli oggetti identici, come i font
+#   e le risorse ripetute in ogni PDF di partenza quando si uniscono blocchi o pagine in cache
+OUTPUT_PROFILES = {
+    'fast': {'page_compression': 0, 'dedupe_objects': False},
+    'default': {'page_compression': 1, 'dedupe_objects': False},
+    'compact': {'page_compression': 1, 'dedupe_objects': True},
+}
+
+def compact_merged_pdf(writer, profile):
+    """Applica a un PdfWriter di pypdf le ottimizzazioni previste dal profilo."""
+    settings = OUTPUT_PROFILES[profile]
+    if settings['page_compression']:
+        for page in writer.pages:
+            page.compress_content_streams()
+    if settings['dedupe_objects']:
+        writer.compress_identical_objects(remove_identicals=True, remove_orphans=True)
+
+def compact_pdf_file(output_path, profile):
+    """Riscrive con pypdf un PDF creato in un solo passaggio, se il profilo lo richiede."""
+    if not OUTPUT_PROFILES[profile]['dedupe_objects']:
+        return
+    
+    from pypdf import PdfWriter
+    
+    writer = PdfWriter(clone_from=str(output_path))
+    compact_merged_pdf(writer, profile)
+    temp_path = Path(output_path).with_suffix('.tmp')
+    with open(temp_path, 'wb') as output_file:
+        writer.write(output_file)
+    writer.close()
+    os.replace(temp_path, output_path)
+
+def create_pdf_styles():
+    """Crea gli stili ReportLab usati per titolo e contenuto dei certificati."""
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    
+    styles = getSampleStyleSheet()
+    
+    # Stile personalizzato per il titolo
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        spaceAfter=30,
+        textColor=colors.darkblue,
+        alignment=1  # Centro
+    )
+    
+    # Stile per il contenuto
+    content_style = ParagraphStyle(
+        'CustomContent',
+        parent=styles['Normal'],
+        fontSize=10,
+        fontName='Courier',  # Font monospace per mantenere formattazione
+        spaceAfter=12,
+        leftIndent=20,
+        rightIndent=20
+    )
+    
+    return title_style, content_style
+
+class _FlowableStream(list):
+    """Lista di flowable che si riempie a richiesta da un generatore.
+    
+    SimpleDocTemplate.build consuma la lista dalla testa; così in memoria restano
+    solo i flowable del certificato in corso di impaginazione.
+    """
+    
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+    
+    def __len__(self):
+        while not list.__len__(self):
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                return 0
+            self.extend(chunk)
+        return list.__len__(self)
+
+def certificate_outline_entry(cert_file, content):
+    """Restituisce titolo del segnalibro e campi Tipo/Valore/Footprint di un certificato.
+    
+    Se il testo non segue il modello di certifica.pas il titolo è il nome del file.
+    """
+    name = cert_file.stem.replace('_Certificato', '')
+    fields = parse_certificate_fields(content)
+    if fields is None:
+        return name, {'tipo': None, 'valore': None, 'footprint': None}
+    
+    component = {key: fields[key] for key in ('tipo', 'valore', 'footprint')}
+    parts = [part for part in (component['tipo'], component['valore']) if part]
+    title = ' '.join(parts) or name
+    if component['footprint']:
+        title += f" ({component['footprint']})"
+    return title, component
+
+class _PageIndex(list):
+    """page_index che ricorda anche il canvas, per leggere la pagina raggiunta dall'impaginazione."""
+    canvas = None
+
+def mark_certificate_page(canv, cert_file, content, page_index):
+    """Aggiunge segnalibro e voce di outline alla pagina corrente e la registra in page_index."""
+    title, component = certificate_outline_entry(cert_file, content)
+    key = f"cert{len(page_index)}"
+    canv.bookmarkPage(key)
+    canv.addOutlineEntry(title, key, level=0)
+    page_index.append({'file': cert_file.name, 'page': canv.getPageNumber(), 'title': title, **component})
+    if isinstance(page_index, _PageIndex):
+        page_index.canvas = canv
+
+def make_certificate_marker(cert_file, content, page_index):
+    """Flowable di dimensione nulla che marca l'inizio di un certificato nel motore Platypus."""
+    from reportlab.platypus import Flowable
+    
+    class CertificateMarker(Flowable):
+        def wrap(self, available_width, available_height):
+            return 0, 0
         
-        for i, cert_file in enumerate(certificate_files):
-            print(f"  Processando: {cert_file.name} ({i+1}/{len(certificate_files)})")
+        def draw(self):
+            mark_certificate_page(self.canv, cert_file, content, page_index)
+    
+    return CertificateMarker()
+
+def build_certificate_flowables(cert_file, content, title_style, content_style):
+    """Crea i flowable ReportLab (titolo e righe) per un singolo certificato."""
+    from reportlab.platypus import Paragraph, Spacer
+    from reportlab.lib.units import inch
+    
+    flowables = []
+    
+    # Titolo della pagina
+    title = f"Certificato: {cert_file.stem.replace('_Certificato', '')}"
+    flowables.append(Paragraph(title, title_style))
+    flowables.append(Spacer(1, 0.2*inch))
+    
+    # Contenuto del certificato
+    # Dividi il contenuto in righe e crea paragrafi
+    lines = content.split('\n')
+    for line in lines:
+        if line.strip():  # Salta righe vuote
+            # Escape caratteri speciali per ReportLab
+            escaped_line = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+            # Tronca righe troppo lunghe
+            if len(escaped_line) > 200:
+                escaped_line = escaped_line[:200] + "..."
+            flowables.append(Paragraph(escaped_line, content_style))
+        else:
+            flowables.append(Spacer(1, 0.1*inch))
+    
+    return flowables
+
+def build_pdf_document(doc, flowables):
+    """Esegue l'impaginazione Platypus (separata per poterla misurare con --trace)."""
+    doc.build(flowables)
+
+def render_certificate_records(records, output_path, verbose=True, total=None, profile='default',
+                               page_index=None):
+    """Impagina i record dei certificati in un PDF e restituisce (successi, errori).
+    
+    I record vengono consumati uno alla volta, quindi possono arrivare da un generatore.
+    Il PDF viene scritto solo se almeno un certificato è stato convertito.
+    Se page_index è una lista, ogni certificato riceve un segnalibro e la sua pagina
+    iniziale viene aggiunta alla lista.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, PageBreak
+    
+    # Crea il documento PDF
+    doc = SimpleDocTemplate(str(output_path), pagesize=A4,
+                            pageCompression=OUTPUT_PROFILES[profile]['page_compression'])
+    title_style, content_style = create_pdf_styles()
+    
+    counters = {'successful': 0, 'failed': 0}
+    
+    def certificate_chunks():
+        for i, record in enumerate(records):
+            cert_file = record['path']
+            if verbose:
+                progress = f"{i+1}/{total}" if total else f"{i+1}"
+                print(f"  Processando: {cert_file.name} ({progress})")
             
             try:
-                # Leggi il contenuto del certificato
-                content = read_certificate_content(cert_file)
-                
-                if content.startswith("Errore nella lettura"):
-                    print(f"    SALTATO - Errore di lettura")
-                    failed_conversions += 1
+                if record['text'] is None:
+                    print(f"Errore: Impossibile leggere {cert_file} con nessun encoding")
+                    if verbose:
+                        print(f"    SALTATO - Errore di lettura")
+                    counters['failed'] += 1
                     continue
                 
-                # Titolo della pagina
-                title = f"Certificato: {cert_file.stem.replace('_Certificato', '')}"
-                story.append(Paragraph(title, title_style))
-                story.append(Spacer(1, 0.2*inch))
-                
-                # Contenuto del certificato
-                # Dividi il contenuto in righe e crea paragrafi
-                lines = content.split('\n')
-                for line in lines:
-                    if line.strip():  # Salta righe vuote
-                        # Escape caratteri speciali per ReportLab
-                        escaped_line = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        # Tronca righe troppo lunghe
-                        if len(escaped_line) > 200:
-                            escaped_line = escaped_line[:200] + "..."
-                        story.append(Paragraph(escaped_line, content_style))
-                    else:
-                        story.append(Spacer(1, 0.1*inch))
+                content = clean_certificate_text(record['text'])
+                flowables = build_certificate_flowables(cert_file, content, title_style, content_style)
+                if page_index is not None:
+                    flowables.insert(0, make_certificate_marker(cert_file, content, page_index))
                 
-                # Aggiungi interruzione di pagina se non è l'ultimo certificato
-                if i < len(certificate_files) - 1:
-                    story.append(PageBreak())
+                # Ogni certificato dopo il primo inizia su una nuova pagina
+                if counters['successful'] > 0:
+                    flowables.insert(0, PageBreak())
                 
-                successful_conversions += 1
-                print(f"    OK - Convertito con successo")
+                counters['successful'] += 1
+                if verbose:
+                    print(f"    OK - Convertito con successo")
                 
             except Exception as e:
-                print(f"    ERRORE - Conversione fallita: {e}")
-                failed_conversions += 1
+                if verbose:
+                    print(f"    ERRORE - Conversione fallita: {e}")
+                counters['failed'] += 1
                 continue
-        
-        if successful_conversions == 0:
-            print("Errore: Nessun certificato è stato convertito con successo!")
-            return False
-        
-        # Genera il PDF
-        doc.build(story)
-        
-        print(f"\nRiepilogo conversione:")
-        print(f"  Successi: {successful_conversions}")
-        print(f"  Errori: {failed_conversions}")
-        
-        return True
-        
-    except Exception as e:
-        print(f"Errore nella creazione del PDF: {e}")
-        return False
-
-def main():
-    print("CONVERTITORE CERTIFICATI TXT a PDF")
-    print()
+            
+            yield flowables
     
-    # Installa pacchetti necessari
-    print("Controllo dipendenze...")
-    if not install_required_packages():
-        print("Impossibile installare le dipendenze necessarie.")
-        input("Premi INVIO per uscire...")
-        return
+    chunks = certificate_chunks()
+    first_chunk = next(chunks, None)
     
-    print()
+    # Genera il PDF
+    if first_chunk is not None:
+        build_pdf_document(doc, _FlowableStream(itertools.chain([first_chunk], chunks)))
     
-    # Trova la cartella certificati
-    print("Ricerca cartella Certificati...")
-    certificates_folder = find_certificates_folder()
+    return counters['successful'], counters['failed']
+
+def wrap_monospace_line(text, max_chars):
+    """Spezza una riga come farebbe Paragraph: spazi compressi e a capo tra le parole."""
+    import textwrap
     
-    if not certificates_folder:
-        print("Cartella 'Certificati' non trovata automaticamente.")
-        print("Vuoi inserire manualmente il percorso della cartella?")
-        choice = input("Inserire percorso manualmente? (s/n): ").lower().strip()
-        
-        if choice == 's':
-            certificates_folder = get_manual_certificates_folder()
-            if not certificates_folder:
-                print("Operazione annullata.")
-                input("Premi INVIO per uscire...")
-                return
-        else:
-            print("Operazione annullata.")
-            print("Assicurati di aver eseguito prima lo script certifica.pas di Altium.")
-            input("Premi INVIO per uscire...")
-            return
-    else:
-        print(f"Cartella trovata automaticamente: {certificates_folder}")
+    words = text.split()
+    if not words:
+        return []
+    return textwrap.wrap(' '.join(words), width=max_chars, break_long_words=True, break_on_hyphens=False)
+
+def create_canvas_layout():
+    """Calcola la geometria di pagina usata dai motori che disegnano direttamente sul canvas.
     
-    # Diagnostica dei file
-    print("\nEseguendo diagnostica dei file...")
-    choice = input("Vuoi eseguire la diagnostica completa? (s/n): ").lower().strip()
+    Riproduce l'area utile del frame di SimpleDocTemplate (margini 1 inch, padding 6pt)
+    e gli stili di create_pdf_styles, così l'output coincide con quello di Platypus.
+    """
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import inch
+    from reportlab.pdfbase.pdfmetrics import stringWidth
     
-    if choice == 's':
-        valid_files = diagnose_files(certificates_folder)
-        if not valid_files:
-            print("Nessun file valido trovato dopo la diagnostica!")
-            input("Premi INVIO per uscire...")
-            return
-        certificate_files = valid_files
-    else:
-        # Trova i file certificato normalmente
-        certificate_files = get_certificate_files(certificates_folder)
+    title_style, content_style = create_pdf_styles()
+    page_width, page_height = A4
     
-    if not certificate_files:
-        print("Nessun file .txt trovato nella cartella Certificati!")
-        print(f"Cartella controllata: {certificates_folder}")
-        input("Premi INVIO per uscire...")
-        return
+    frame_padding = 6
+    frame_left = inch + frame_padding
+    frame_width = page_width - 2 * inch - 2 * frame_padding
+    content_width = frame_width - content_style.leftIndent - content_style.rightIndent
+    char_width = stringWidth('M', content_style.fontName, content_style.fontSize)
     
-    print(f"\nTrovati {len(certificate_files)} certificati da convertire:")
-    for cert_file in certificate_files:
-        print(f"  - {cert_file.name}")
+    return {
+        'title_style': title_style,
+        'content_style': content_style,
+        'frame_left': frame_left,
+        'frame_width': frame_width,
+        'frame_top': page_height - inch - frame_padding,
+        'frame_bottom': inch + frame_padding,
+        'content_left': frame_left + content_style.leftIndent,
+        'char_width': char_width,
+        'max_chars': max(1, int(content_width // char_width)),
+        'title_gap': 0.2 * inch,
+        'blank_line_height': 0.1 * inch,
+    }
+
+def begin_content_text(pdf, layout):
+    """Crea un oggetto testo con il font del contenuto dei certificati."""
+    content_style = layout['content_style']
+    text = pdf.beginText()
+    text.setFont(content_style.fontName, content_style.fontSize)
+    text.setFillColor(content_style.textColor)
+    return text
+
+def draw_certificate_title(pdf, cert_file, layout):
+    """Disegna il titolo centrato del certificato e restituisce la y da cui parte il contenuto."""
+    title_style = layout['title_style']
+    title = f"Certificato: {cert_file.stem.replace('_Certificato', '')}"
+    pdf.setFillColor(title_style.textColor)
+    pdf.setFont(title_style.fontName, title_style.fontSize)
+    pdf.drawCentredString(layout['frame_left'] + layout['frame_width'] / 2,
+                          layout['frame_top'] - title_style.fontSize, title)
+    return layout['frame_top'] - title_style.leading - title_style.spaceAfter - layout['title_gap']
+
+def truncate_certificate_line(line):
+    """Applica il troncamento a 200 caratteri del percorso Platypus (calcolato sul testo con escape)."""
+    escaped_line = line.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    if len(escaped_line) > 200:
+        from xml.sax.saxutils import unescape
+        return unescape(escaped_line[:200]) + "..."
+    return line
+
+def draw_certificate_canvas(pdf, cert_file, content, layout):
+    """Disegna un certificato riga per riga, continuando sulle pagine successive se serve."""
+    content_style = layout['content_style']
+    y = draw_certificate_title(pdf, cert_file, layout)
+    text = begin_content_text(pdf, layout)
     
-    print()
+    for line in content.split('\n'):
+        if not line.strip():  # Righe vuote come Spacer
+            if y - layout['blank_line_height'] < layout['frame_bottom']:
+                # Come Platypus, uno Spacer che non entra passa alla pagina successiva
+                pdf.drawText(text)
+                pdf.showPage()
+                text = begin_content_text(pdf, layout)
+                y = layout['frame_top']
+            y -= layout['blank_line_height']
+            continue
+        
+        wrapped = wrap_monospace_line(truncate_certificate_line(line), layout['max_chars'])
+        if y - len(wrapped) * content_style.leading < layout['frame_bottom']:
+            # Il contenuto continua sulla pagina successiva
+            pdf.drawText(text)
+            pdf.showPage()
+            text = begin_content_text(pdf, layout)
+            y = layout['frame_top']
+        
+        for wrapped_line in wrapped:
+            text.setTextOrigin(layout['content_left'], y - content_style.fontSize)
+            text.textOut(wrapped_line)
+            y -= content_style.leading
+        y -= content_style.spaceAfter
     
-    # Crea il nome del file PDF
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    project_name = certificates_folder.parent.name
-    output_filename = f"Certificati_{project_name}_{timestamp}.pdf"
-    output_path = certificates_folder / output_filename
+    pdf.drawText(text)
+
+def render_records_on_canvas(records, output_path, draw_certificate, verbose=True, total=None, profile='default',
+                             page_index=None):
+    """Ciclo comune ai motori canvas: un certificato per pagina, restituisce (successi, errori)."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
     
-    print(f"Creazione PDF: {output_filename}")
-    print(f"Percorso output: {output_path}")
+    pdf = canvas.Canvas(str(output_path), pagesize=A4,
+                        pageCompression=OUTPUT_PROFILES[profile]['page_compression'])
+    successful_conversions = 0
+    failed_conversions = 0
     
-    # Crea il PDF unificato
-    if create_unified_pdf(certificate_files, output_path):
+    for i, record in enumerate(records):
+        cert_file = record['path']
+        if verbose:
+            progress = f"{i+1}/{total}" if total else f"{i+1}"
+            print(f"  Processando: {cert_file.name} ({progress})")
+        
+        try:
+            if record['text'] is None:
+                print(f"Errore: Impossibile leggere {cert_file} con nessun encoding")
+                if verbose:
+                    print(f"    SALTATO - Errore di lettura")
+                failed_conversions += 1
+                continue
+            
+            content = clean_certificate_text(record['text'])
+            
+            # Ogni certificato dopo il primo inizia su una nuova pagina
+            if successful_conversions > 0:
+                pdf.showPage()
+            
+            if page_index is not None:
+                mark_certificate_page(pdf, cert_file, content, page_index)
+            draw_certificate(pdf, cert_file, content)
+            
+            successful_conversions += 1
+            if verbose:
+                print(f"    OK - Convertito con successo")
+            
+        except Exception as e:
+            if verbose:
+                print(f"    ERRORE - Conversione fallita: {e}")
+            failed_conversions += 1
+            continue
+    
+    # Genera il PDF
+    if successful_conversions > 0:
+        pdf.save()
+    
+    return successful_conversions, failed_conversions
+
+def render_certificate_records_canvas(records, output_path, verbose=True, total=None, profile='default',
+                                      page_index=None):
+    """Disegna i certificati direttamente sul canvas ReportLab e restituisce (successi, errori).
+    
+    Alternativa veloce a render_certificate_records: niente parsing del markup né
+    Paragraph per riga, ma stessa impaginazione (titolo centrato, Courier 10,
+    troncamento a 200 caratteri, un certificato per pagina).
+    """
+    layout = create_canvas_layout()
+    
+    def draw_certificate(pdf, cert_file, content):
+        draw_certificate_canvas(pdf, cert_file, content, layout)
+    
+    return render_records_on_canvas(records, output_path, draw_certificate, verbose, total, profile, page_index)
+
+# Struttura del testo prodotto da GeneratePDFContent in certifica.pas:
+# (testo statico o etichetta, nome del campo variabile oppure None)
+CERTIFICATE_TEMPLATE = [
+    ('CERTIFICATO COMPONENTE', None),
+    ('', None),
+    ('=' * 48, None),
+    ('INFORMAZIONI PROGETTO:', None),
+    ('  Nome: ', 'nome'),
+    ('  Percorso: ', 'percorso'),
+    ('  Data Creazione: ', 'data_creazione'),
+    ('  Data Certificazione: ', 'data_certificazione'),
+    ('', None),
+    ('INFORMAZIONI COMPONENTE:', None),
+    ('  Tipo: ', 'tipo'),
+    ('  Valore: ', 'valore'),
+    ('  Footprint: ', 'footprint'),
+    ('  Descrizione: ', 'descrizione'),
+    ('  Primo Designatore: ', 'primo_designatore'),
+    ('  Quantità nel Progetto: ', 'quantita'),
+    ('', None),
+    ('CERTIFICAZIONE:', None),
+    ('  Certificato da: ', 'certificato_da'),
+    ('  Data: ', 'data'),
+    ('', None),
+    ('=' * 48, None),
+    ('Questo certificato attesta la presenza e le', None),
+    ('caratteristiche del componente nel progetto.', None),
+    ('=' * 48, None),
+]
+
+def parse_certificate_fields(content):
+    """Estrae i campi variabili da un certificato nel formato di certifica.pas.
+    
+    Restituisce None se il testo non segue esattamente la struttura di CERTIFICATE_TEMPLATE.
+    """
+    lines = content.split('\n')
+    if len(lines) < len(CERTIFICATE_TEMPLATE):
+        return None
+    
+    fields = {}
+    for line, (template_text, field) in zip(lines, CERTIFICATE_TEMPLATE):
+        if field is None:
+            if line.rstrip() != template_text:
+                return None
+        elif line.startswith(template_text) or line == template_text.rstrip():
+            fields[field] = line[len(template_text):].strip()
+        else:
+            return None
+    
+    # Dopo la struttura attesa sono ammesse solo righe vuote
+    if any(line.strip() for line in lines[len(CERTIFICATE_TEMPLATE):]):
+        return None
+    
+    return fields
+
+def render_certificate_records_template(records, output_path, verbose=True, total=None, profile='default',
+                                        page_index=None):
+    """Impagina i certificati da modello e restituisce (successi, errori).
+    
+    Le parti fisse del certificato (intestazione, separatori, titoli di sezione,
+    etichette e chiusura) vengono disegnate una sola volta in un form PDF riusato
+    da ogni pagina; per ogni certificato si disegnano solo titolo e valori dei campi.
+    I certificati che non seguono il modello vengono disegnati come nel motore canvas.
+    """
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    
+    layout = create_canvas_layout()
+    content_style = layout['content_style']
+    form_name = 'CertificatoStatico'
+    
+    # Posizioni delle righe del modello, con la stessa spaziatura del motore canvas
+    template_rows = []
+    y = layout['frame_top'] - layout['title_style'].leading - layout['title_style'].spaceAfter - layout['title_gap']
+    for template_text, field in CERTIFICATE_TEMPLATE:
+        if not template_text.strip():
+            y -= layout['blank_line_height']
+            continue
+        label = ' '.join(template_text.split())
+        value_x = layout['content_left'] + stringWidth(label + ' ', content_style.fontName, content_style.fontSize)
+        template_rows.append((label, field, value_x, y - content_style.fontSize))
+        y -= content_style.leading + content_style.spaceAfter
+    
+    defined_forms = set()
+    
+    def define_static_form(pdf):
+        pdf.beginForm(form_name)
+        text = begin_content_text(pdf, layout)
+        for label, field, value_x, baseline in template_rows:
+            text.setTextOrigin(layout['content_left'], baseline)
+            text.textOut(label)
+        pdf.drawText(text)
+        pdf.endForm()
+        defined_forms.add(form_name)
+    
+    def draw_certificate(pdf, cert_file, content):
+        fields = parse_certificate_fields(content)
+        
+        # Il modello vale solo se ogni riga sta su una sola riga di stampa senza troncamenti
+        if fields is not None:
+            for label, field, value_x, baseline in template_rows:
+                if field is None:
+                    continue
+                line = f"{label} {' '.join(fields[field].split())}"
+                if len(line) > layout['max_chars'] or truncate_certificate_line(line) != line:
+                    fields = None
+                    break
+        
+        if fields is None:
+            draw_certificate_canvas(pdf, cert_file, content, layout)
+            return
+        
+        if form_name not in defined_forms:
+            define_static_form(pdf)
+        
+        pdf.doForm(form_name)
+        draw_certificate_title(pdf, cert_file, layout)
+        
+        text = begin_content_text(pdf, layout)
+        for label, field, value_x, baseline in template_rows:
+            if field is not None and fields[field]:
+                text.setTextOrigin(value_x, baseline)
+                text.textOut(' '.join(fields[field].split()))
+        pdf.drawText(text)
+    
+    return render_records_on_canvas(records, output_path, draw_certificate, verbose, total, profile, page_index)
+
+# Motori di impaginazione disponibili (opzione --renderer)
+RENDERERS = {
+    'platypus': render_certificate_records,
+    'canvas': render_certificate_records_canvas,
+    'template': render_certificate_records_template,
+}
+
+def render_certificates(certificate_files, output_path, verbose=True, renderer='platypus', profile='default',
+                        prefetch=PREFETCH_DEPTH):
+    """Impagina i certificati in un PDF e restituisce (successi, errori)."""
+    records = prefetch_certificates(certificate_files, depth=prefetch)
+    return RENDERERS[renderer](records, output_path, verbose=verbose, total=len(certificate_files), profile=profile)
+
+def render_pdf_shard(shard):
+    """Impagina un blocco di certificati in un PDF separato (eseguito in un processo del pool)."""
+    shard_files, cached_records, shard_path, renderer, profile, prefetch = shard
+    
+    # Riutilizza i record già decodificati dal processo principale
+    for record in cached_records:
+        _certificate_cache[str(record['path'])] = record
+    
+    successful, failed = render_certificates(shard_files, shard_path, verbose=False, renderer=renderer, profile=profile,
+                                             prefetch=prefetch)
+    return shard_path if successful > 0 else None, successful, failed
+
+def split_into_shards(items, shard_count):
+    """Divide una lista in blocchi contigui di dimensione simile, mantenendo l'ordine."""
+    shard_count = max(1, min(shard_count, len(items)))
+    shard_size, remainder = divmod(len(items), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + shard_size + (1 if i < remainder else 0)
+        shards.append(items[start:end])
+        start = end
+    return shards
+
+def create_sharded_pdf(certificate_files, output_path, jobs, renderer='platypus', profile='default',
+                       prefetch=PREFETCH_DEPTH):
+    """Impagina i certificati in parallelo a blocchi e unisce i PDF nell'ordine originale."""
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+    from pypdf import PdfWriter
+    
+    # Più blocchi che processi per bilanciare il carico tra i worker
+    shards = split_into_shards(list(certificate_files), jobs * 4)
+    print(f"Impaginazione parallela: {len(shards)} blocchi su {jobs} processi")
+    
+    successful_conversions = 0
+    failed_conversions = 0
+    
+    with tempfile.TemporaryDirectory(dir=Path(output_path).parent) as temp_dir:
+        tasks = []
+        for index, shard_files in enumerate(shards):
+            # I record passano ai worker: il processo principale non li conserva più
+            cached_records = [_certificate_cache.pop(str(f)) for f in shard_files if str(f) in _certificate_cache]
+            shard_path = Path(temp_dir) / f"blocco_{index:05d}.pdf"
+            tasks.append((shard_files, cached_records, shard_path, renderer, profile, prefetch))
+        
+        shard_paths = []
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            for index, (shard_path, successful, failed) in enumerate(executor.map(render_pdf_shard, tasks), 1):
+                successful_conversions += successful
+                failed_conversions += failed
+                print(f"  Blocco {index}/{len(shards)}: {successful} convertiti, {failed} errori")
+                if shard_path:
+                    shard_paths.append(shard_path)
+        
+        if successful_conversions > 0:
+            # Unisci i blocchi nell'ordine originale
+            writer = PdfWriter()
+            for shard_path in shard_paths:
+                writer.append(str(shard_path))
+            compact_merged_pdf(writer, profile)
+            with open(output_path, 'wb') as output_file:
+                writer.write(output_file)
+            writer.close()
+    
+    return successful_conversions, failed_conversions
+
+# Dimensione media stimata di una pagina, usata per il primo volume con --volume-size
+ESTIMATED_PAGE_BYTES = 4096
+
+def create_volume_path(output_path, volume_number):
+    """Percorso del volume N accanto al PDF richiesto (es. Certificati_X_vol001.pdf)."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_vol{volume_number:03d}{output_path.suffix}")
+
+def create_index_path(output_path):
+    """Percorso dell'indice componenti -> volume/pagina dei PDF a volumi."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_indice.json")
+
+def estimate_certificate_pages(record, one_page_lines):
+    """Stima per eccesso le pagine di un certificato dal numero di righe.
+    
+    one_page_lines è il massimo di righe di un certificato già impaginato in una sola
+    pagina (0 se non è ancora noto: la stima è allora una pagina).
+    """
+    if record['text'] is None:
+        return 0
+    if not one_page_lines:
+        return 1
+    lines = record['text'].count('\n') + 1
+    return max(1, -(-lines // one_page_lines))
+
+def create_volume_pdfs(certificate_files, output_path, renderer='platypus', profile='default',
+                       volume_pages=None, volume_bytes=None, prefetch=PREFETCH_DEPTH):
+    """Impagina i certificati in più volumi limitati per pagine e/o dimensione.
+    
+    Prima di aggiungere un certificato si confronta la pagina raggiunta dal volume più
+    le pagine stimate del certificato con il limite; un certificato non viene mai
+    diviso tra due volumi. Se la stima è stata superata (righe molto lunghe che vanno
+    a capo) il volume viene reimpaginato senza i certificati in eccesso, che passano
+    al volume successivo. Il limite in byte è convertito in pagine usando la dimensione
+    media delle pagine dei volumi già scritti. Ogni volume ha un segnalibro per
+    certificato e accanto ai volumi viene salvato un indice JSON componente ->
+    volume/pagina con pagina iniziale e numero di pagine. Restituisce (successi, errori).
+    """
+    records = prefetch_certificates(certificate_files, depth=prefetch)
+    pending = []
+    successful_conversions = 0
+    failed_conversions = 0
+    bytes_per_page = ESTIMATED_PAGE_BYTES
+    one_page_lines = 0
+    total_pages = 0
+    total_bytes = 0
+    volumes = []
+    components = []
+    
+    def next_record():
+        if pending:
+            return pending.pop()
+        return next(records, None)
+    
+    def render_volume(volume_records, volume_path, page_index, page_budget=None):
+        """Impagina un volume; restituisce (successi, errori, pagine, record impaginati)."""
+        rendered = []
+        state = {'pages': 0, 'last_lines': None}
+        
+        def tracked_records():
+            nonlocal one_page_lines
+            for record in volume_records:
+                # Il certificato precedente è già disegnato: la pagina corrente è la sua ultima
+                if page_index.canvas is not None:
+                    state['pages'] = page_index.canvas.getPageNumber()
+                    if state['last_lines'] and state['pages'] == page_index[-1]['page']:
+                        one_page_lines = max(one_page_lines, state['last_lines'])
+                    if page_budget and state['pages'] + estimate_certificate_pages(record, one_page_lines) > page_budget:
+                        pending.append(record)
+                        return
+                rendered.append(record)
+                state['last_lines'] = record['text'].count('\n') + 1 if record['text'] is not None else None
+                yield record
+            if page_index.canvas is not None:
+                state['pages'] = page_index.canvas.getPageNumber()
+        
+        successful, failed = RENDERERS[renderer](tracked_records(), volume_path, verbose=False,
+                                                 profile=profile, page_index=page_index)
+        
+        # Pagine occupate da ogni certificato, fino all'inizio del successivo
+        ends = [entry['page'] - 1 for entry in page_index[1:]] + [state['pages']]
+        for entry, end in zip(page_index, ends):
+            entry['pages'] = end - entry['page'] + 1
+        return successful, failed, state['pages'], rendered
+    
+    def next_volume_records():
+        while True:
+            record = next_record()
+            if record is None:
+                return
+            yield record
+    
+    while True:
+        record = next_record()
+        if record is None:
+            break
+        pending.append(record)
+        
+        page_budget = volume_pages or sys.maxsize
+        if volume_bytes:
+            page_budget = min(page_budget, max(1, volume_bytes // bytes_per_page))
+        
+        volume_number = len(volumes) + 1
+        volume_path = create_volume_path(output_path, volume_number)
+        page_index = _PageIndex()
+        
+        print(f"  Volume {volume_number}: {volume_path.name}")
+        successful, failed, volume_page_count, rendered = render_volume(next_volume_records(), volume_path,
+                                                                        page_index, page_budget)
+        
+        if successful and volume_page_count > page_budget and len(page_index) > 1:
+            # Stima superata: tieni i certificati che finiscono entro il limite
+            keep = max(1, sum(1 for entry in page_index if entry['page'] + entry['pages'] - 1 <= page_budget))
+            kept_records = []
+            for record in rendered:
+                if keep == 0:
+                    break
+                kept_records.append(record)
+                if record['text'] is not None:
+                    keep -= 1
+            pending.extend(reversed(rendered[len(kept_records):]))
+            print(f"    Limite di {page_budget} pagine superato: {len(rendered) - len(kept_records)} "
+                  f"certificati passano al volume successivo")
+            
+            page_index = _PageIndex()
+            successful, failed, volume_page_count, rendered = render_volume(kept_records, volume_path, page_index)
+        
+        successful_conversions += successful
+        failed_conversions += failed
+        if not successful:
+            continue
+        
+        compact_pdf_file(volume_path, profile)
+        volume_size = volume_path.stat().st_size
+        total_pages += volume_page_count
+        total_bytes += volume_size
+        bytes_per_page = max(1, total_bytes // total_pages)
+        print(f"    {successful} certificati, {volume_page_count} pagine, {volume_size/1024:.1f} KB")
+        
+        volumes.append({'volume': volume_number, 'file': volume_path.name, 'certificates': successful,
+                        'pages': volume_page_count, 'size': volume_size})
+        for entry in page_index:
+            components.append({'volume': volume_number, 'volume_file': volume_path.name, **entry})
+    
+    if volumes:
+        index = {
+            'generated_at': datetime.now().isoformat(timespec='seconds'),
+            'renderer': renderer,
+            'profile': profile,
+            'volume_pages': volume_pages,
+            'volume_bytes': volume_bytes,
+            'volumes': volumes,
+            'components': components,
+        }
+        index_path = create_index_path(output_path)
+        index_path.write_text(json.dumps(index, ensure_ascii=False, indent=1), encoding='utf-8')
+        print(f"Creati {len(volumes)} volumi, indice componenti: {index_path.name}")
+    
+    return successful_conversions, failed_conversions
+
+def finish_conversion(successful_conversions, failed_conversions, stats=None):
+    """Stampa il riepilogo della conversione, aggiorna stats e restituisce l'esito."""
+    if stats is not None:
+        stats.update(successful=successful_conversions, failed=failed_conversions)
+    
+    if successful_conversions == 0:
+        print("Errore: Nessun certificato è stato convertito con successo!")
+        return False
+    
+    print(f"\nRiepilogo conversione:")
+    print(f"  Successi: {successful_conversions}")
+    print(f"  Errori: {failed_conversions}")
+    
+    return True
+
+def create_unified_pdf(certificate_files, output_path, jobs=1, renderer='platypus', stats=None, profile='default',
+                       volume_pages=None, volume_bytes=None, prefetch=PREFETCH_DEPTH):
+    """Crea un PDF unificato con tutti i certificati.
+    
+    Durante l'impaginazione i prossimi prefetch certificati vengono letti in anticipo.
+    Con jobs > 1 i certificati vengono impaginati a blocchi in parallelo e poi uniti.
+    Con volume_pages o volume_bytes l'output viene diviso in volumi con indice
+    (vedi create_volume_pdfs). Se passato, stats viene aggiornato con i contatori
+    della conversione.
+    """
+    try:
+        print(f"Creazione PDF con {len(certificate_files)} certificati...")
+        
+        if volume_pages or volume_bytes:
+            if jobs > 1:
+                print("Nota: i volumi vengono impaginati in sequenza, --render-jobs ignorato")
+            successful_conversions, failed_conversions = create_volume_pdfs(certificate_files, output_path, renderer,
+                                                                            profile, volume_pages, volume_bytes,
+                                                                            prefetch)
+        elif jobs > 1 and len(certificate_files) > 1:
+            successful_conversions, failed_conversions = create_sharded_pdf(certificate_files, output_path, jobs,
+                                                                            renderer, profile, prefetch)
+        else:
+            successful_conversions, failed_conversions = render_certificates(certificate_files, output_path,
+                                                                             renderer=renderer, profile=profile,
+                                                                             prefetch=prefetch)
+            if successful_conversions > 0:
+                compact_pdf_file(output_path, profile)
+        
+        return finish_conversion(successful_conversions, failed_conversions, stats)
+        
+    except Exception as e:
+        print(f"Errore nella creazione del PDF: {e}")
+        return False
+
+def compare_output_profiles(certificate_files, renderer='platypus', jobs=1):
+    """Crea il PDF con ogni profilo di output e confronta dimensione e tempo di creazione."""
+    import tempfile
+    
+    print(f"\nConfronto profili di output su {len(certificate_files)} certificati (motore: {renderer})")
+    results = []
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for profile in OUTPUT_PROFILES:
+            output_path = Path(temp_dir) / f"profilo_{profile}.pdf"
+            start_time = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                success = create_unified_pdf(certificate_files, output_path, jobs=jobs,
+                                             renderer=renderer, profile=profile)
+            duration = time.perf_counter() - start_time
+            size = output_path.stat().st_size if success else 0
+            results.append({'profile': profile, 'success': success, 'size': size, 'duration_s': round(duration, 3)})
+    
+    print(f"  {'Profilo':<10} {'Dimensione':>12} {'Tempo':>9}")
+    for result in results:
+        if result['success']:
+            print(f"  {result['profile']:<10} {result['size']/1024:>9.1f} KB {result['duration_s']:>8.2f}s")
+        else:
+            print(f"  {result['profile']:<10} {'errore':>12}")
+    
+    return results
+
+def iter_streamed_records(certificates_folder, validate, summary):
+    """Legge e (opzionalmente) valida i certificati uno alla volta senza conservarli.
+    
+    I file problematici vengono esclusi e annotati in summary.
+    """
+    for cert_file in iter_certificate_files(certificates_folder):
+        record = load_certificate(cert_file, use_cache=False)
+        summary['total'] += 1
+        
+        if validate and record['issues']:
+            summary['problematic'].append((cert_file.name, record['issues']))
+            print(f"  ESCLUSO - {cert_file.name}: {', '.join(record['issues'])}")
+            continue
+        
+        yield record
+
+# Certificati impaginati in ogni segmento della conversione in streaming: ReportLab tiene in
+# memoria tutte le pagine di un documento fino al salvataggio, quindi il PDF finale viene
+# composto accodando segmenti di dimensione fissa
+STREAM_SEGMENT_SIZE = 500
+
+def begin_pdf_stream(output, temp_dir):
+    """Inizia un PDF composto da segmenti ReportLab accodati uno dopo l'altro.
+    
+    Gli oggetti 1 (albero delle pagine) e 2 (catalogo) vengono scritti alla fine; le
+    voci xref degli altri oggetti finiscono in un file temporaneo, così in memoria non
+    resta nulla che cresca con il numero di pagine.
+    """
+    output.write(b'%PDF-1.4\n%\x93\x8c\x8b\x9e\n')
+    return {
+        'output': output,
+        'xref': open(Path(temp_dir) / 'xref.tmp', 'w+b'),
+        'next_object': 3,
+        'segments': [],
+        'pages': 0,
+    }
+
+def append_pdf_segment(state, data):
+    """Accoda al PDF in streaming gli oggetti di un PDF creato da ReportLab.
+    
+    Gli oggetti vengono rinumerati; catalogo e Info del segmento vengono scartati e il
+    suo albero delle pagine diventa un nodo intermedio dell'albero finale. Vale per
+    l'output di ReportLab (xref classica, /Length diretti, riferimenti fuori dalle
+    stringhe), non per PDF qualsiasi.
+    """
+    import re
+    
+    startxref = int(re.search(rb'startxref\s+(\d+)', data[-1024:]).group(1))
+    xref = re.compile(rb'xref\s+0\s+(\d+)\s+').match(data, startxref)
+    count = int(xref.group(1))
+    offsets = [int(data[xref.end() + i * 20:xref.end() + i * 20 + 10]) for i in range(1, count)]
+    trailer = data[xref.end() + count * 20:]
+    header_pattern = re.compile(rb'\d+\s+0\s+obj\s*')
+    stream_pattern = re.compile(rb'stream\r?\n')
+    
+    def object_parts(number):
+        # Dizionario (da rinumerare) e stream eventuale (da copiare così com'è)
+        header = header_pattern.match(data, offsets[number - 1])
+        stream = stream_pattern.search(data, header.end())
+        end = data.index(b'endobj', header.end())
+        if stream is None or stream.start() > end:
+            return data[header.end():end].rstrip(), b''
+        length = int(re.search(rb'/Length (\d+)', data[header.end():stream.start()]).group(1))
+        stream_end = data.index(b'endobj', stream.end() + length)
+        return data[header.end():stream.start()].rstrip(), data[stream.start():stream_end].rstrip()
+    
+    root = int(re.search(rb'/Root (\d+) 0 R', trailer).group(1))
+    info = re.search(rb'/Info (\d+) 0 R', trailer)
+    pages_root = int(re.search(rb'/Pages (\d+) 0 R', object_parts(root)[0]).group(1))
+    skipped = {root, int(info.group(1)) if info else None}
+    
+    numbers = {}
+    for number in range(1, count):
+        if number not in skipped:
+            numbers[number] = state['next_object']
+            state['next_object'] += 1
+    
+    def renumber(match):
+        return b'%d 0 R' % numbers[int(match.group(1))]
+    
+    output = state['output']
+    for number, new_number in numbers.items():
+        dictionary, stream = object_parts(number)
+        dictionary = re.sub(rb'(\d+) 0 R', renumber, dictionary)
+        if number == pages_root:
+            state['pages'] += int(re.search(rb'/Count (\d+)', dictionary).group(1))
+            state['segments'].append(new_number)
+            dictionary = dictionary.replace(b'<<', b'<<\n/Parent 1 0 R', 1)
+        state['xref'].write(b'%010d 00000 n \n' % output.tell())
+        output.write(b'%d 0 obj\n' % new_number + dictionary + b'\n')
+        if stream:
+            output.write(stream + b'\n')
+        output.write(b'endobj\n')
+
+def finish_pdf_stream(state):
+    """Scrive albero delle pagine, catalogo, xref e trailer del PDF in streaming."""
+    output = state['output']
+    offsets = [output.tell()]
+    kids = b' '.join(b'%d 0 R' % number for number in state['segments'])
+    output.write(b'1 0 obj\n<<\n/Count %d /Kids [ %s ] /Type /Pages\n>>\nendobj\n' % (state['pages'], kids))
+    offsets.append(output.tell())
+    output.write(b'2 0 obj\n<<\n/PageMode /UseNone /Pages 1 0 R /Type /Catalog\n>>\nendobj\n')
+    
+    xref_offset = output.tell()
+    output.write(b'xref\n0 %d\n0000000000 65535 f \n' % state['next_object'])
+    for offset in offsets:
+        output.write(b'%010d 00000 n \n' % offset)
+    state['xref'].seek(0)
+    while True:
+        chunk = state['xref'].read(MMAP_CHUNK_SIZE)
+        if not chunk:
+            break
+        output.write(chunk)
+    state['xref'].close()
+    output.write(b'trailer\n<<\n/Root 2 0 R /Size %d\n>>\nstartxref\n%d\n%%%%EOF\n' % (state['next_object'], xref_offset))
+
+def render_streamed_segments(records, output_path, renderer='platypus', profile='default',
+                             segment_size=STREAM_SEGMENT_SIZE):
+    """Impagina i record a segmenti di segment_size certificati accodandoli in un unico PDF.
+    
+    Ogni segmento viene impaginato in un PDF temporaneo, accodato e cancellato: la
+    memoria dipende dalla dimensione del segmento, non dal numero di certificati.
+    Restituisce (successi, errori).
+    """
+    import tempfile
+    
+    output_path = Path(output_path)
+    temp_path = output_path.with_suffix('.tmp')
+    successful_conversions = 0
+    failed_conversions = 0
+    
+    with tempfile.TemporaryDirectory(dir=output_path.parent) as temp_dir:
+        segment_path = Path(temp_dir) / 'segmento.pdf'
+        with open(temp_path, 'wb') as output:
+            state = begin_pdf_stream(output, temp_dir)
+            while True:
+                segment = itertools.islice(records, segment_size)
+                successful, failed = RENDERERS[renderer](segment, segment_path, verbose=False, profile=profile)
+                if not successful and not failed:
+                    break
+                successful_conversions += successful
+                failed_conversions += failed
+                if successful:
+                    append_pdf_segment(state, segment_path.read_bytes())
+                    segment_path.unlink()
+                print(f"  Certificati impaginati: {successful_conversions} ({failed_conversions} errori)")
+            finish_pdf_stream(state)
+    
+    if successful_conversions > 0:
+        os.replace(temp_path, output_path)
+    else:
+        temp_path.unlink()
+    return successful_conversions, failed_conversions
+
+def create_streaming_pdf(certificates_folder, output_path, validate=False, renderer='platypus', stats=None,
+                         profile='default'):
+    """Converte la cartella certificati in un unico passaggio a memoria limitata.
+    
+    Pipeline: elenco file -> decodifica -> validazione -> impaginazione -> scrittura pagine.
+    Nessuna lista con tutti i certificati o tutti i flowable viene mai costruita, i record
+    non entrano nella cache e le pagine vengono scritte a segmenti (render_streamed_segments).
+    """
+    try:
+        print(f"Creazione PDF in streaming dalla cartella {certificates_folder}...")
+        
+        summary = {'total': 0, 'problematic': []}
+        records = iter_streamed_records(certificates_folder, validate, summary)
+        successful_conversions, failed_conversions = render_streamed_segments(records, output_path, renderer,
+                                                                              profile)
+        if successful_conversions > 0:
+            compact_pdf_file(output_path, profile)
+        
+        print(f"\nFile .txt elaborati: {summary['total']}")
+        if validate:
+            print(f"File problematici (esclusi): {len(summary['problematic'])}")
+        if stats is not None:
+            stats['excluded'] = len(summary['problematic'])
+        
+        return finish_conversion(successful_conversions, failed_conversions, stats)
+        
+    except Exception as e:
+        print(f"Errore nella creazione del PDF: {e}")
+        return False
+
+# Cartella (accanto a Certificati) con il manifest e le pagine già impaginate
+INCREMENTAL_CACHE_FOLDER = '.certificati_cache'
+MANIFEST_VERSION = 1
+# Versione dell'impaginazione: va incrementata a ogni modifica dell'aspetto delle
+# pagine (motori, stili, profili), così le pagine già in cache vengono rigenerate
+LAYOUT_VERSION = 1
+
+def load_manifest(cache_folder):
+    """Carica il manifest della conversione incrementale (vuoto se assente o non valido)."""
+    manifest_path = cache_folder / 'manifest.json'
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == MANIFEST_VERSION:
+            return manifest
+        print("Manifest di una versione precedente: verrà ricostruito")
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Manifest non leggibile ({e}): verrà ricostruito")
+    return {'version': MANIFEST_VERSION, 'files': {}}
+
+def save_manifest(cache_folder, manifest):
+    """Salva il manifest in modo atomico (file temporaneo + rinomina)."""
+    manifest_path = cache_folder / 'manifest.json'
+    temp_path = cache_folder / 'manifest.json.tmp'
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(temp_path, manifest_path)
+
+def create_incremental_pdf(certificates_folder, output_path, validate=False, renderer='platypus', stats=None,
+                           profile='default'):
+    """Crea il PDF unificato ricalcolando solo i certificati nuovi o modificati.
+    
+    Per ogni certificato il manifest registra dimensione, data di modifica, hash del
+    contenuto, diagnostica e la pagina PDF già impaginata; il PDF finale viene
+    riassemblato dalle pagine in cache. Le pagine impaginate con un LAYOUT_VERSION
+    diverso non vengono riutilizzate.
+    """
+    try:
+        from pypdf import PdfWriter
+        
+        cache_folder = certificates_folder.parent / INCREMENTAL_CACHE_FOLDER
+        pages_folder = cache_folder / 'pagine'
+        pages_folder.mkdir(parents=True, exist_ok=True)
+        
+        manifest = load_manifest(cache_folder)
+        old_entries = manifest['files']
+        if old_entries and manifest.get('layout_version') != LAYOUT_VERSION:
+            print("Impaginazione cambiata: le pagine in cache verranno rigenerate")
+        new_entries = {}
+        used_pages = set()
+        
+        successful_conversions = 0
+        failed_conversions = 0
+        excluded_files = 0
+        reused_pages = 0
+        rendered_pages = 0
+        
+        print(f"Creazione PDF incrementale dalla cartella {certificates_folder}...")
+        writer = PdfWriter()
+        
+        for cert_file in iter_certificate_files(certificates_folder):
+            try:
+                stat = cert_file.stat()
+            except FileNotFoundError:
+                # Cancellato dopo l'elenco della cartella (es. in modalità watch): come se non ci fosse
+                print(f"  Rimosso: {cert_file.name}")
+                continue
+            entry = old_entries.get(cert_file.name)
+            
+            # Dimensione o data di modifica cambiate: rileggi e confronta l'hash
+            if not entry or entry['size'] != stat.st_size or entry['mtime'] != stat.st_mtime_ns:
+                record = load_certificate(cert_file, use_cache=False)
+                if record['text'] is None and not cert_file.exists():
+                    print(f"  Rimosso: {cert_file.name}")
+                    continue
+                if not entry or entry['hash'] != record['hash']:
+                    print(f"  Modificato: {cert_file.name}")
+                entry = {
+                    'size': record['size'],
+                    'mtime': record['mtime'],
+                    'hash': record['hash'],
+                    'encoding': record['encoding'],
+                    'readable': record['text'] is not None,
+                    'issues': record['issues'],
+                }
+            else:
+                record = None
+            new_entries[cert_file.name] = entry
+            
+            if validate and entry['issues']:
+                print(f"  ESCLUSO - {cert_file.name}: {', '.join(entry['issues'])}")
+                excluded_files += 1
+                continue
+            
+            if not entry['readable']:
+                print(f"  SALTATO - Errore di lettura: {cert_file.name}")
+                failed_conversions += 1
+                continue
+            
+            # Il titolo della pagina dipende dal nome del file, quindi entra nella chiave
+            page_key = f"{cert_file.name}|{entry['hash']}|{renderer}|{profile}|{LAYOUT_VERSION}"
+            page_key = hashlib.sha256(page_key.encode('utf-8')).hexdigest()
+            page_path = pages_folder / f"{page_key}.pdf"
+            if page_path.exists():
+                reused_pages += 1
+            else:
+                if record is None:
+                    record = load_certificate(cert_file, use_cache=False)
+                successful, failed = RENDERERS[renderer]([record], page_path, verbose=False, profile=profile)
+                if not successful:
+                    print(f"  ERRORE - Conversione fallita: {cert_file.name}")
+                    failed_conversions += 1
+                    continue
+                rendered_pages += 1
+            
+            writer.append(str(page_path))
+            used_pages.add(page_path.name)
+            successful_conversions += 1
+        
+        if successful_conversions > 0:
+            compact_merged_pdf(writer, profile)
+            # File temporaneo + rinomina: chi ha il PDF aperto non vede mai un file a metà
+            temp_path = Path(output_path).with_suffix('.tmp')
+            with open(temp_path, 'wb') as output_file:
+                writer.write(output_file)
+            os.replace(temp_path, output_path)
+        writer.close()
+        
+        manifest['files'] = new_entries
+        manifest['layout_version'] = LAYOUT_VERSION
+        save_manifest(cache_folder, manifest)
+        
+        # Rimuovi le pagine non più referenziate
+        for page_path in pages_folder.glob("*.pdf"):
+            if page_path.name not in used_pages:
+                page_path.unlink()
+        
+        print(f"\nPagine riutilizzate dalla cache: {reused_pages}")
+        print(f"Pagine impaginate ora: {rendered_pages}")
+        if validate:
+            print(f"File problematici (esclusi): {excluded_files}")
+        if stats is not None:
+            stats.update(excluded=excluded_files, reused=reused_pages, rendered=rendered_pages)
+        
+        return finish_conversion(successful_conversions, failed_conversions, stats)
+        
+    except Exception as e:
+        print(f"Errore nella creazione del PDF: {e}")
+        return False
+
+# Colonne di una distinta base (BOM) esportata da Altium, in ordine di preferenza.
+# Corrispondono ai dati usati da certifica.pas: ComponentDescription, parametro
+# Value/Val, CurrentPartID (footprint), LibReference e designatore.
+BOM_COLUMNS = {
+    'tipo': ['description', 'descrizione', 'component description'],
+    'valore': ['value', 'val', 'valore'],
+    'footprint': ['footprint', 'current footprint', 'part id'],
+    'libreria': ['libref', 'lib ref', 'library reference', 'design item id'],
+    'designatore': ['designator', 'designatore'],
+    'quantita': ['quantity', 'qty', 'quantità', 'quantita'],
+}
+BOM_SIGNATURE = 'Certificatore Altium'
+
+def find_bom_columns(header):
+    """Associa i campi di BOM_COLUMNS agli indici delle colonne dell'intestazione."""
+    names = [name.strip().lower() for name in header]
+    columns = {}
+    for field, aliases in BOM_COLUMNS.items():
+        for alias in aliases:
+            if alias in names:
+                columns[field] = names.index(alias)
+                break
+    return columns
+
+def read_bom_rows(bom_path):
+    """Legge la distinta base CSV e restituisce (colonne, righe) con separatore rilevato automaticamente."""
+    with open(bom_path, 'rb') as f:
+        text, encoding = decode_certificate_bytes(f.read())
+    if text is None:
+        raise ValueError(f"Impossibile decodificare {bom_path}")
+    
+    try:
+        dialect = csv.Sniffer().sniff(text[:4096], delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    rows = csv.reader(io.StringIO(text), dialect)
+    
+    header = next(rows, None)
+    if not header:
+        raise ValueError(f"Distinta base vuota: {bom_path}")
+    columns = find_bom_columns(header)
+    missing = [field for field in ('tipo', 'valore', 'footprint') if field not in columns]
+    if missing:
+        raise ValueError(f"Colonne mancanti nella distinta base: {', '.join(missing)} (intestazione: {header})")
+    return columns, rows
+
+def aggregate_bom_components(bom_path):
+    """Raggruppa le righe della BOM per chiave Tipo|Valore|Footprint, come AddComponentInfo di certifica.pas.
+    
+    Un dizionario sostituisce la ricerca lineare di FindComponentInfoIndex e non c'è
+    il limite MaxComponents. Le righe raggruppate ("R1, R2, R3") contano quanto la
+    colonna Quantity o, in sua assenza, quanto i designatori elencati.
+    Restituisce (componenti in ordine di prima apparizione, righe lette).
+    """
+    columns, rows = read_bom_rows(bom_path)
+    
+    def cell(row, field):
+        index = columns.get(field)
+        return row[index].strip() if index is not None and index < len(row) else ''
+    
+    components = {}
+    row_count = 0
+    for row in rows:
+        if not any(value.strip() for value in row):
+            continue
+        row_count += 1
+        
+        designators = [d for d in cell(row, 'designatore').replace(';', ',').split(',') if d.strip()]
+        quantity = cell(row, 'quantita')
+        quantity = int(quantity) if quantity.isdigit() else max(1, len(designators))
+        
+        key = f"{cell(row, 'tipo')}|{cell(row, 'valore')}|{cell(row, 'footprint')}"
+        component = components.get(key)
+        if component is None:
+            components[key] = {
+                'tipo': cell(row, 'tipo'),
+                'valore': cell(row, 'valore'),
+                'footprint': cell(row, 'footprint'),
+                'descrizione': cell(row, 'libreria'),
+                'primo_designatore': designators[0].strip() if designators else '',
+                'quantita': quantity,
+            }
+        else:
+            component['quantita'] += quantity
+    
+    return list(components.values()), row_count
+
+def format_certificate_text(fields):
+    """Compone il testo del certificato come GeneratePDFContent di certifica.pas."""
+    return '\n'.join(template_text + str(fields[field]) if field else template_text
+                     for template_text, field in CERTIFICATE_TEMPLATE)
+
+def iter_bom_records(bom_path, project_name, project_path, certification_date=None, summary=None):
+    """Genera in memoria i record dei certificati di una BOM, senza file di testo intermedi.
+    
+    Il nome di ogni certificato è "<LibReference>_Certificato.txt", come in certifica.pas:
+    a parità di nome vale l'ultimo componente scritto, proprio come quando
+    certifica.pas sovrascrive il file. I record seguono l'ordine alfabetico dei nomi,
+    lo stesso della conversione dalla cartella Certificati.
+    """
+    components, row_count = aggregate_bom_components(bom_path)
+    certification_date = certification_date or datetime.now().strftime('%d/%m/%Y')
+    
+    certificates = {}
+    for component in components:
+        certificates[f"{component['descrizione']}_Certificato.txt"] = component
+    
+    if summary is not None:
+        summary.update(rows=row_count, components=len(components), certificates=len(certificates))
+    
+    bom_folder = Path(bom_path).parent
+    for name in sorted(certificates, key=str.lower):
+        fields = dict(certificates[name], nome=project_name, percorso=project_path,
+                      data_creazione=certification_date, data_certificazione=certification_date,
+                      certificato_da=BOM_SIGNATURE, data=certification_date)
+        text = format_certificate_text(fields)
+        yield {'path': bom_folder / "Certificati" / name, 'text': text, 'issues': [],
+               'encoding': 'utf-8', 'size': len(text)}
+
+def create_bom_pdf(bom_path, output_path, project_name=None, project_path=None, renderer='platypus', stats=None,
+                   profile='default'):
+    """Crea il PDF unificato direttamente da una distinta base CSV esportata da Altium."""
+    try:
+        bom_path = Path(bom_path)
+        project_name = project_name or bom_path.stem
+        project_path = project_path or str(bom_path.resolve().parent)
+        print(f"Creazione PDF dalla distinta base {bom_path.name}...")
+        
+        summary = {}
+        records = iter_bom_records(bom_path, project_name, project_path, summary=summary)
+        successful_conversions, failed_conversions = RENDERERS[renderer](records, output_path, verbose=False,
+                                                                         total=None, profile=profile)
+        if successful_conversions > 0:
+            compact_pdf_file(output_path, profile)
+        
+        print(f"Righe lette: {summary.get('rows', 0)}")
+        print(f"Componenti distinti (Tipo|Valore|Footprint): {summary.get('components', 0)}")
+        if summary.get('certificates', 0) < summary.get('components', 0):
+            print(f"Attenzione: {summary['components'] - summary['certificates']} componenti condividono il "
+                  f"nome file di un altro (stesso LibRef) e, come in certifica.pas, vale l'ultimo")
+        
+        return finish_conversion(successful_conversions, failed_conversions, stats)
+        
+    except Exception as e:
+        print(f"Errore nella creazione del PDF: {e}")
+        return False
+
+# Indice SQLite dei componenti certificati, condiviso da tutti i progetti
+COMPONENT_INDEX_PATH = Path.home() / '.converti_certificati_componenti.sqlite'
+
+# Campi interrogabili con --query: nome sulla riga di comando -> colonna dell'indice
+COMPONENT_QUERY_FIELDS = {
+    'progetto': 'project',
+    'cartella': 'project_folder',
+    'percorso': 'project_path',
+    'tipo': 'tipo',
+    'valore': 'valore',
+    'footprint': 'footprint',
+    'descrizione': 'descrizione',
+    'designatore': 'primo_designatore',
+    'quantita': 'quantita',
+    'data': 'data_certificazione',
+    'file': 'file_name',
+}
+
+def open_component_index(db_path=None):
+    """Apre (creandolo se serve) l'indice SQLite dei componenti."""
+    import sqlite3
+    
+    connection = sqlite3.connect(str(db_path or COMPONENT_INDEX_PATH), timeout=30)
+    connection.row_factory = sqlite3.Row
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS certificates (
+            path TEXT PRIMARY KEY,
+            project_folder TEXT NOT NULL,
+            file_name TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime INTEGER NOT NULL,
+            hash TEXT,
+            parsed INTEGER NOT NULL,
+            project TEXT COLLATE NOCASE,
+            project_path TEXT COLLATE NOCASE,
+            tipo TEXT COLLATE NOCASE,
+            valore TEXT COLLATE NOCASE,
+            footprint TEXT COLLATE NOCASE,
+            descrizione TEXT COLLATE NOCASE,
+            primo_designatore TEXT COLLATE NOCASE,
+            quantita INTEGER,
+            data_certificazione TEXT,
+            certificato_da TEXT,
+            indexed_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_certificates_folder ON certificates (project_folder);
+        CREATE INDEX IF NOT EXISTS idx_certificates_tipo ON certificates (tipo);
+        CREATE INDEX IF NOT EXISTS idx_certificates_valore ON certificates (valore);
+        CREATE INDEX IF NOT EXISTS idx_certificates_footprint ON certificates (footprint);
+        CREATE INDEX IF NOT EXISTS idx_certificates_project ON certificates (project);
+    """)
+    return connection
+
+def update_component_index(certificates_folder, db_path=None):
+    """Aggiorna l'indice con i certificati di una cartella, rileggendo solo i file cambiati.
+    
+    I file con dimensione e data di modifica invariate vengono saltati; quelli non più
+    presenti vengono rimossi. I certificati che non seguono il modello di certifica.pas
+    restano nell'indice con i campi vuoti. Restituisce i contatori dell'aggiornamento.
+    """
+    certificates_folder = Path(certificates_folder).resolve()
+    project_folder = str(certificates_folder.parent)
+    summary = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0}
+    indexed_at = datetime.now().isoformat(timespec='seconds')
+    
+    connection = open_component_index(db_path)
+    try:
+        with connection:
+            indexed = {row['path']: (row['size'], row['mtime']) for row in connection.execute(
+                "SELECT path, size, mtime FROM certificates WHERE project_folder = ?", (project_folder,))}
+            
+            snapshot = snapshot_certificates_folder(certificates_folder)
+            for name in sorted(snapshot, key=str.lower):
+                cert_file = certificates_folder / name
+                if indexed.get(str(cert_file)) == snapshot[name]:
+                    summary['unchanged'] += 1
+                    continue
+                
+                # Come in streaming: i record non restano in cache durante l'indicizzazione
+                record = load_certificate(cert_file, use_cache=False)
+                fields = None
+                if record['text'] is not None:
+                    fields = parse_certificate_fields(clean_certificate_text(record['text']))
+                fields = fields or {}
+                quantity = fields.get('quantita', '')
+                
+                connection.execute(
+                    "INSERT OR REPLACE INTO certificates VALUES "
+                    "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (str(cert_file), project_folder, name, record['size'], record['mtime'], record['hash'],
+                     int(bool(fields)), fields.get('nome') or certificates_folder.parent.name,
+                     fields.get('percorso'), fields.get('tipo'), fields.get('valore'), fields.get('footprint'),
+                     fields.get('descrizione'), fields.get('primo_designatore'),
+                     int(quantity) if quantity.isdigit() else None,
+                     fields.get('data_certificazione'), fields.get('certificato_da'), indexed_at))
+                summary['updated' if str(cert_file) in indexed else 'added'] += 1
+            
+            removed = [(path,) for path in indexed if Path(path).name not in snapshot]
+            connection.executemany("DELETE FROM certificates WHERE path = ?", removed)
+            summary['removed'] = len(removed)
+    finally:
+        connection.close()
+    
+    print(f"Indice componenti aggiornato: {summary['added']} nuovi, {summary['updated']} modificati, "
+          f"{summary['removed']} rimossi, {summary['unchanged']} invariati")
+    return summary
+
+def parse_query_filters(filters):
+    """Converte i filtri CAMPO=VALORE di --query in una clausola WHERE con parametri.
+    
+    I valori con * o ? sono confrontati come caratteri jolly; il confronto ignora
+    maiuscole e minuscole.
+    """
+    clauses = []
+    parameters = []
+    for query_filter in filters:
+        field, separator, value = query_filter.partition('=')
+        column = COMPONENT_QUERY_FIELDS.get(field.strip().lower())
+        if not separator or column is None:
+            raise ValueError(f"Filtro non valido '{query_filter}': usare CAMPO=VALORE con CAMPO tra "
+                             f"{', '.join(COMPONENT_QUERY_FIELDS)}")
+        value = value.strip()
+        if '*' in value or '?' in value:
+            pattern = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append(f"{column} LIKE ? ESCAPE '\\'")
+            parameters.append(pattern.replace('*', '%').replace('?', '_'))
+        else:
+            clauses.append(f"{column} = ? COLLATE NOCASE")
+            parameters.append(value)
+    return ' AND '.join(clauses) or '1', parameters
+
+def query_component_index(filters, db_path=None):
+    """Cerca nell'indice i certificati che soddisfano tutti i filtri CAMPO=VALORE."""
+    where, parameters = parse_query_filters(filters)
+    connection = open_component_index(db_path)
+    try:
+        rows = connection.execute(
+            f"SELECT * FROM certificates WHERE {where} ORDER BY project, tipo, valore, footprint, file_name",
+            parameters).fetchall()
+    finally:
+        connection.close()
+    return [dict(row) for row in rows]
+
+def run_component_query(filters, db_path=None):
+    """Stampa i risultati di --query e restituisce il codice di uscita."""
+    start_time = time.perf_counter()
+    try:
+        rows = query_component_index(filters, db_path)
+    except Exception as e:
+        print(f"Errore nella ricerca: {e}")
+        return 1
+    duration_ms = (time.perf_counter() - start_time) * 1000
+    
+    projects = sorted({row['project_folder'] for row in rows}, key=str.lower)
+    print(f"{'Progetto':<20} {'Tipo':<16} {'Valore':<12} {'Footprint':<16} {'Q.tà':>5} {'Designatore':<12} File")
+    for row in rows:
+        quantity = '' if row['quantita'] is None else row['quantita']
+        print(f"{row['project'] or '':<20} {row['tipo'] or '':<16} {row['valore'] or '':<12} "
+              f"{row['footprint'] or '':<16} {quantity:>5} {row['primo_designatore'] or '':<12} {row['path']}")
+    print(f"\n{len(rows)} certificati in {len(projects)} progetti ({duration_ms:.1f} ms)")
+    return 0
+
+# Modalità watch: intervallo tra due scansioni e attesa dopo l'ultima modifica (secondi)
+WATCH_POLL_INTERVAL = 1.0
+WATCH_DEBOUNCE = 2.0
+
+def snapshot_certificates_folder(certificates_folder):
+    """Restituisce {nome: (dimensione, data di modifica)} dei .txt con una sola scansione della cartella."""
+    snapshot = {}
+    try:
+        with os.scandir(certificates_folder) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith('.txt') and entry.is_file():
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # cancellato durante la scansione
+                    snapshot[entry.name] = (stat.st_size, stat.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return snapshot
+
+def watch_certificates_folder(certificates_folder, output_path, validate=False, renderer='platypus',
+                              profile='default', interval=WATCH_POLL_INTERVAL, debounce=WATCH_DEBOUNCE,
+                              index_db=None):
+    """Tiene aggiornato il PDF unificato mentre certifica.pas scrive i certificati.
+    
+    La cartella viene scansionata ogni interval secondi; dopo una raffica di scritture
+    si attende che resti invariata per debounce secondi e poi si rigenera il PDF con
+    create_incremental_pdf, che reimpagina solo i certificati nuovi o modificati.
+    Con index_db anche l'indice dei componenti viene aggiornato. Se la cartella resta
+    senza certificati il PDF viene rimosso, così non ne resta uno non aggiornato.
+    Termina con Ctrl+C.
+    """
+    print(f"Modalità watch sulla cartella: {certificates_folder}")
+    print(f"PDF aggiornato: {output_path}")
+    print("Premi Ctrl+C per terminare.")
+    
+    output_path = Path(output_path)
+    converted = None  # nessuna conversione ancora: il primo controllo allinea sempre il PDF
+    current = snapshot_certificates_folder(certificates_folder)
+    last_change = time.monotonic() - debounce
+    
+    try:
+        while True:
+            if current != converted and time.monotonic() - last_change >= debounce:
+                previous = converted or {}
+                changed = sum(1 for name, state in current.items() if previous.get(name) != state)
+                removed = sum(1 for name in previous if name not in current)
+                print(f"\n[{datetime.now():%H:%M:%S}] Modifiche rilevate: {changed} nuovi o modificati, "
+                      f"{removed} rimossi")
+                
+                start_time = time.perf_counter()
+                if not current:
+                    # Nessun certificato: un PDF rimasto descriverebbe componenti che non ci sono più
+                    if output_path.exists():
+                        output_path.unlink()
+                        print(f"Nessun certificato nella cartella: PDF rimosso ({output_path.name})")
+                    else:
+                        print("Nessun certificato nella cartella: nessun PDF da creare")
+                elif create_incremental_pdf(certificates_folder, output_path, validate=validate,
+                                            renderer=renderer, profile=profile):
+                    print(f"PDF aggiornato in {time.perf_counter() - start_time:.1f}s: {output_path.name}")
+                else:
+                    print("Aggiornamento del PDF non riuscito: nuovo tentativo alla prossima modifica")
+                if index_db:
+                    update_component_index(certificates_folder, index_db)
+                converted = current
+            
+            time.sleep(interval)
+            snapshot = snapshot_certificates_folder(certificates_folder)
+            if snapshot != current:
+                current = snapshot
+                last_change = time.monotonic()
+    except KeyboardInterrupt:
+        print("\nModalità watch terminata.")
+
+def create_output_path(certificates_folder):
+    """Crea il percorso del PDF unificato con nome progetto e timestamp."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    project_name = certificates_folder.parent.name
+    output_filename = f"Certificati_{project_name}_{timestamp}.pdf"
+    return certificates_folder / output_filename
+
+def expand_project_roots(patterns):
+    """Espande percorsi e pattern glob nelle cartelle di progetto, senza duplicati."""
+    project_roots = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"Attenzione: nessuna cartella corrisponde a '{pattern}'")
+        for match in matches:
+            project_root = Path(match).resolve()
+            if not project_root.is_dir():
+                print(f"Attenzione: '{match}' non è una cartella, ignorato")
+                continue
+            if project_root not in seen:
+                seen.add(project_root)
+                project_roots.append(project_root)
+    return project_roots
+
+def convert_project(task):
+    """Converte la cartella Certificati di un progetto senza interazione (eseguito nel pool).
+    
+    L'output dettagliato viene salvato in un file .log accanto al PDF; restituisce
+    il report del progetto.
+    """
+    project_root, options = task
+    certificates_folder = project_root / "Certificati"
+    report = {
+        'project': project_root.name,
+        'project_root': str(project_root),
+        'output': None,
+        'status': 'errore',
+        'successful': 0,
+        'failed': 0,
+        'excluded': 0,
+        'duration_s': 0.0,
+        'error': None,
+    }
+    start_time = time.perf_counter()
+    
+    if not certificates_folder.is_dir():
+        report['status'] = 'cartella non trovata'
+        report['error'] = f"Cartella 'Certificati' non trovata in {project_root}"
+        return report
+    
+    output_path = create_output_path(certificates_folder)
+    log_buffer = io.StringIO()
+    stats = {}
+    
+    try:
+        with contextlib.redirect_stdout(log_buffer):
+            if options['index_db']:
+                update_component_index(certificates_folder, options['index_db'])
+            
+            if options['incremental']:
+                success = create_incremental_pdf(certificates_folder, output_path, validate=options['diagnose'],
+                                                 renderer=options['renderer'], stats=stats, profile=options['profile'])
+            elif options['stream']:
+                success = create_streaming_pdf(certificates_folder, output_path, validate=options['diagnose'],
+                                               renderer=options['renderer'], stats=stats, profile=options['profile'])
+            else:
+                if options['diagnose']:
+                    all_files = get_certificate_files(certificates_folder)
+                    certificate_files = diagnose_files(certificates_folder)
+                    stats['excluded'] = len(all_files) - len(certificate_files)
+                else:
+                    certificate_files = get_certificate_files(certificates_folder)
+                
+                if certificate_files:
+                    success = create_unified_pdf(certificate_files, output_path, jobs=options['render_jobs'],
+                                                 renderer=options['renderer'], stats=stats, profile=options['profile'],
+                                                 volume_pages=options['volume_pages'],
+                                                 volume_bytes=options['volume_bytes'], prefetch=options['prefetch'])
+                else:
+                    print("Nessun certificato da convertire")
+                    success = False
+        
+        report.update({key: stats[key] for key in ('successful', 'failed', 'excluded') if key in stats})
+        if success:
+            report['status'] = 'ok'
+            if options['volume_pages'] or options['volume_bytes']:
+                output_path = create_index_path(output_path)
+            report['output'] = str(output_path)
+        elif not stats.get('successful'):
+            report['status'] = 'nessun certificato'
+    
+    except Exception as e:
+        report['error'] = str(e)
+    
+    report['duration_s'] = round(time.perf_counter() - start_time, 3)
+    
+    # Salva l'output dettagliato per consultazione successiva
+    try:
+        log_path = output_path.with_suffix('.log')
+        log_path.write_text(log_buffer.getvalue(), encoding='utf-8')
+    except Exception:
+        pass
+    
+    return report
+
+def run_batch(project_patterns, workers, report_path=None, options=None):
+    """Converte in modo non interattivo i certificati di più progetti in parallelo.
+    
+    Scrive un report JSON per progetto (contatori, durata, errori) e restituisce
+    il codice di uscita: 0 se tutti i progetti sono stati convertiti.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    
+    options = options or {}
+    options.setdefault('diagnose', False)
+    options.setdefault('stream', False)
+    options.setdefault('incremental', False)
+    options.setdefault('renderer', 'platypus')
+    options.setdefault('render_jobs', 1)
+    options.setdefault('profile', 'default')
+    options.setdefault('volume_pages', None)
+    options.setdefault('volume_bytes', None)
+    options.setdefault('prefetch', PREFETCH_DEPTH)
+    options.setdefault('index_db', None)
+    
+    project_roots = expand_project_roots(project_patterns)
+    if not project_roots:
+        print("Nessuna cartella di progetto trovata per i percorsi indicati.")
+        return 1
+    
+    workers = min(resolve_jobs(workers), len(project_roots))
+    print(f"Conversione batch di {len(project_roots)} progetti con {workers} processi")
+    start_time = time.perf_counter()
+    
+    tasks = [(project_root, options) for project_root in project_roots]
+    reports = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for report in executor.map(convert_project, tasks):
+            reports.append(report)
+            print(f"  [{report['status']}] {report['project']}: {report['successful']} convertiti, "
+                  f"{report['failed']} errori, {report['excluded']} esclusi ({report['duration_s']:.1f}s)")
+            if report['error']:
+                print(f"     - {report['error']}")
+    
+    summary = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'workers': workers,
+        'duration_s': round(time.perf_counter() - start_time, 3),
+        'projects_total': len(reports),
+        'projects_ok': sum(1 for report in reports if report['status'] == 'ok'),
+        'projects': reports,
+    }
+    
+    report_json = json.dumps(summary, ensure_ascii=False, indent=2)
+    if report_path:
+        Path(report_path).write_text(report_json, encoding='utf-8')
+        print(f"Report salvato in: {report_path}")
+    else:
+        print(report_json)
+    
+    return 0 if summary['projects_ok'] == summary['projects_total'] else 1
+
+# Strumentazione (--trace): quando è disattivata le funzioni restano quelle originali,
+# quando è attiva vengono sostituite nel modulo da versioni che registrano i tempi.
+# Funzione -> (fase, True se la misura è per singolo file)
+INSTRUMENTED_FUNCTIONS = {
+    'find_certificates_folder': ('discovery', False),
+    'scan_for_certificates_folder': ('discovery', False),
+    'diagnose_files': ('diagnose', False),
+    'load_certificate': ('decode', True),
+    'validate_certificate': ('validate', True),
+    'build_certificate_flowables': ('layout', True),
+    'build_pdf_document': ('build', False),
+    'create_unified_pdf': ('pdf', False),
+    'create_streaming_pdf': ('pdf', False),
+    'create_incremental_pdf': ('pdf', False),
+}
+
+_instrumentation = None
+_original_functions = {}
+
+def instrumented_file_name(args):
+    """Ricava il nome del certificato dal primo argomento di una funzione misurata."""
+    if not args:
+        return None
+    first = args[0]
+    if isinstance(first, dict):
+        first = first.get('path')
+    return Path(first).name if isinstance(first, (str, Path)) else None
+
+def record_instrumentation_span(stage, name, start_ns, end_ns, file_name=None, result=None):
+    """Registra un intervallo misurato e aggiorna i contatori.
+    
+    Può essere chiamata dai thread lettori della lettura anticipata e della diagnostica:
+    ogni thread ha la sua traccia nel trace e gli aggiornamenti avvengono sotto lock.
+    """
+    import threading
+    
+    state = _instrumentation
+    duration = (end_ns - start_ns) / 1e9
+    thread_id = threading.get_ident()
+    
+    with state['lock']:
+        record_instrumentation_counters(state, stage, name, duration, file_name, result)
+        
+        # Indice progressivo per thread: intervalli sovrapposti di thread diversi
+        # non devono finire sulla stessa traccia, dove verrebbero annidati
+        tid = state['threads'].get(thread_id)
+        if tid is None:
+            tid = state['threads'][thread_id] = len(state['threads'])
+            state['events'].append({'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': tid,
+                                    'args': {'name': threading.current_thread().name}})
+        
+        event = {
+            'name': f"{name} {file_name}" if file_name else name,
+            'cat': stage,
+            'ph': 'X',
+            'ts': (start_ns - state['start_ns']) / 1000,
+            'dur': (end_ns - start_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': tid,
+        }
+        if file_name:
+            event['args'] = {'file': file_name}
+        state['events'].append(event)
+
+def record_instrumentation_counters(state, stage, name, duration, file_name, result):
+    """Aggiorna tempi per fase e per file e i contatori sui record decodificati."""
+    stage_stats = state['stages'].setdefault(stage, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+    stage_stats['count'] += 1
+    stage_stats['total_s'] += duration
+    stage_stats['max_s'] = max(stage_stats['max_s'], duration)
+    
+    if file_name:
+        file_stats = state['files'].setdefault(file_name, {})
+        file_stats[stage] = file_stats.get(stage, 0.0) + duration
+    
+    # Contatori sui record decodificati: byte letti ed encoding effettivamente usati
+    if name == 'load_certificate' and isinstance(result, dict):
+        counters = state['counters']
+        counters['certificates_loaded'] = counters.get('certificates_loaded', 0) + 1
+        counters['bytes_read'] = counters.get('bytes_read', 0) + (result['size'] or 0)
+        encoding_key = f"encoding_{result['encoding']}"
+        counters[encoding_key] = counters.get(encoding_key, 0) + 1
+        if result['issues']:
+            counters['files_with_issues'] = counters.get('files_with_issues', 0) + 1
+
+def make_instrumented(func, stage, per_file):
+    """Avvolge una funzione in modo che ogni chiamata venga registrata."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start_ns = time.perf_counter_ns()
+        result = None
+        try:
+            result = func(*args, **kwargs)
+            return result
+        finally:
+            file_name = instrumented_file_name(args) if per_file else None
+            record_instrumentation_span(stage, func.__name__, start_ns, time.perf_counter_ns(), file_name, result)
+    return wrapper
+
+def enable_instrumentation():
+    """Attiva la registrazione di tempi e contatori per le funzioni in INSTRUMENTED_FUNCTIONS.
+    
+    Vale solo per il processo corrente: i worker dei pool di processi non vengono misurati.
+    """
+    global _instrumentation
+    if _instrumentation is not None:
+        return
+    
+    import threading
+    
+    _instrumentation = {
+        'lock': threading.Lock(),
+        'threads': {},
+        'start_ns': time.perf_counter_ns(),
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'stages': {},
+        'files': {},
+        'counters': {},
+        'events': [],
+    }
+    
+    module_globals = globals()
+    for name, (stage, per_file) in INSTRUMENTED_FUNCTIONS.items():
+        _original_functions[name] = module_globals[name]
+        module_globals[name] = make_instrumented(module_globals[name], stage, per_file)
+    
+    # Anche i motori di impaginazione, richiamati tramite la tabella RENDERERS
+    for renderer, func in list(RENDERERS.items()):
+        _original_functions[('renderer', renderer)] = func
+        RENDERERS[renderer] = make_instrumented(func, 'render', False)
+
+def disable_instrumentation():
+    """Ripristina le funzioni originali e restituisce i dati raccolti."""
+    global _instrumentation
+    state = _instrumentation
+    if state is None:
+        return None
+    
+    module_globals = globals()
+    for key, func in _original_functions.items():
+        if isinstance(key, tuple):
+            RENDERERS[key[1]] = func
+        else:
+            module_globals[key] = func
+    _original_functions.clear()
+    
+    state['wall_time_s'] = (time.perf_counter_ns() - state['start_ns']) / 1e9
+    _instrumentation = None
+    return state
+
+def write_instrumentation(state, summary_path):
+    """Salva il riepilogo JSON e il trace in formato Chrome accanto ad esso."""
+    if state is None:
+        return
+    
+    summary_path = Path(summary_path)
+    trace_path = summary_path.with_suffix('.trace.json')
+    
+    stages = {stage: {'count': stats['count'], 'total_s': round(stats['total_s'], 6), 'max_s': round(stats['max_s'], 6)}
+              for stage, stats in state['stages'].items()}
+    slowest_files = sorted(state['files'].items(), key=lambda item: sum(item[1].values()), reverse=True)
+    
+    summary = {
+        'started_at': state['started_at'],
+        'wall_time_s': round(state['wall_time_s'], 6),
+        'stages': stages,
+        'counters': state['counters'],
+        'slowest_files': [{'file': name, **{stage: round(value, 6) for stage, value in timings.items()}}
+                          for name, timings in slowest_files[:20]],
+        'files': {name: {stage: round(value, 6) for stage, value in timings.items()}
+                  for name, timings in state['files'].items()},
+    }
+    
+    try:
+        summary_path.write_text(json.dumps(summary, ensure_ascii=False, indent=2), encoding='utf-8')
+        trace_path.write_text(json.dumps({'traceEvents': state['events'], 'displayTimeUnit': 'ms'}), encoding='utf-8')
+    except Exception as e:
+        print(f"Errore nel salvataggio della strumentazione: {e}")
+        return
+    
+    print(f"\nStrumentazione salvata in: {summary_path}")
+    print(f"Trace Chrome salvato in: {trace_path}")
+    for stage, stats in sorted(stages.items(), key=lambda item: item[1]['total_s'], reverse=True):
+        print(f"  {stage:<10} {stats['total_s']:>9.3f}s  ({stats['count']} chiamate)")
+
+def parse_arguments(argv=None):
+    """Legge le opzioni da riga di comando."""
+    parser = argparse.ArgumentParser(description="Converte i certificati TXT generati da certifica.pas in un unico PDF.",
+                                     fromfile_prefix_chars='@')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Numero di processi per la diagnostica (0 = tutti i core, default: 1)")
+    parser.add_argument('--render-jobs', type=int, default=1,
+                        help="Numero di processi per l'impaginazione a blocchi del PDF (0 = tutti i core, default: 1)")
+    parser.add_argument('--prefetch', type=int, default=PREFETCH_DEPTH, metavar='N',
+                        help="Certificati letti in anticipo da thread separati durante l'impaginazione "
+                             f"(0 = lettura sequenziale, default: {PREFETCH_DEPTH})")
+    parser.add_argument('--stream', action='store_true',
+                        help="Conversione in un unico passaggio a memoria limitata (per progetti molto grandi)")
+    parser.add_argument('--renderer', choices=sorted(RENDERERS), default='platypus',
+                        help="Motore di impaginazione: 'platypus' (default), 'canvas' (più veloce, solo testo monospace) "
+                             "o 'template' (parti fisse disegnate una sola volta)")
+    parser.add_argument('--profile', choices=list(OUTPUT_PROFILES), default='default',
+                        help="Profilo di output del PDF: 'fast' (nessuna compressione), 'default' "
+                             "o 'compact' (riscrittura con pypdf e oggetti duplicati rimossi)")
+    parser.add_argument('--profile-report', action='store_true',
+                        help="Confronta dimensione e tempo di creazione di ogni profilo sugli stessi certificati")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Ricalcola solo i certificati nuovi o modificati usando la cache in '{INCREMENTAL_CACHE_FOLDER}'")
+    parser.add_argument('--watch', action='store_true',
+                        help="Resta in esecuzione e aggiorna il PDF appena certifica.pas scrive nuovi certificati "
+                             "(conversione incrementale, Ctrl+C per terminare)")
+    parser.add_argument('--watch-interval', type=float, default=WATCH_POLL_INTERVAL, metavar='SECONDI',
+                        help=f"Intervallo tra due scansioni della cartella in modalità watch (default: {WATCH_POLL_INTERVAL})")
+    parser.add_argument('--debounce', type=float, default=WATCH_DEBOUNCE, metavar='SECONDI',
+                        help="Attesa senza modifiche prima di aggiornare il PDF in modalità watch "
+                             f"(default: {WATCH_DEBOUNCE})")
+    parser.add_argument('--search-depth', type=int, default=DISCOVERY_MAX_DEPTH,
+                        help=f"Profondità massima di ricerca della cartella Certificati (default: {DISCOVERY_MAX_DEPTH})")
+    parser.add_argument('--ignore', action='append', default=[], metavar='PATTERN',
+                        help="Cartella (pattern fnmatch) da escludere dalla ricerca, ripetibile")
+    parser.add_argument('--volume-pages', type=int, metavar='N',
+                        help="Divide l'output in volumi di al massimo N pagine, con segnalibri e indice JSON "
+                             "dei componenti (non si applica a --stream e --incremental)")
+    parser.add_argument('--volume-size', type=float, metavar='MB',
+                        help="Divide l'output in volumi di circa MB megabyte (dimensione stimata dalle pagine già scritte)")
+    parser.add_argument('--bom', metavar='FILE.csv',
+                        help="Crea il PDF direttamente da una distinta base CSV esportata da Altium, "
+                             "senza i file di testo di certifica.pas")
+    parser.add_argument('--project-name', metavar='NOME',
+                        help="Nome del progetto nei certificati creati con --bom (default: nome del file CSV)")
+    parser.add_argument('--project-path', metavar='PERCORSO',
+                        help="Percorso del progetto nei certificati creati con --bom (default: cartella del CSV)")
+    parser.add_argument('--update-index', action='store_true',
+                        help="Aggiorna l'indice SQLite dei componenti con i certificati del progetto "
+                             "(solo i file nuovi o modificati)")
+    parser.add_argument('--index-db', metavar='FILE',
+                        help=f"Percorso dell'indice dei componenti (default: {COMPONENT_INDEX_PATH})")
+    parser.add_argument('--query', nargs='*', metavar='CAMPO=VALORE',
+                        help="Cerca nell'indice dei componenti e termina, es. --query footprint=0603 valore=10k "
+                             f"(* e ? come caratteri jolly; campi: {', '.join(COMPONENT_QUERY_FIELDS)})")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="Registra tempi e contatori per fase e per file: riepilogo JSON in FILE "
+                             "e trace in formato Chrome (chrome://tracing) in FILE con estensione .trace.json")
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help="Esegue la conversione sotto cProfile e salva le statistiche in FILE")
+    parser.add_argument('--batch', nargs='+', metavar='PROGETTO',
+                        help="Conversione non interattiva delle cartelle di progetto indicate (percorsi o pattern glob, "
+                             "oppure @file con un percorso per riga)")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Numero di progetti convertiti in parallelo in modalità batch (0 = tutti i core, default: 1)")
+    parser.add_argument('--report', metavar='FILE',
+                        help="File JSON in cui salvare il report della modalità batch (default: stampa a video)")
+    parser.add_argument('--diagnose', action='store_true',
+                        help="In modalità batch e watch esclude i file che non superano la diagnostica")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    
+    if args.trace:
+        enable_instrumentation()
+    profiler = None
+    if args.cprofile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    try:
+        run_converter(args)
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"Profilo cProfile salvato in: {args.cprofile}")
+        if args.trace:
+            write_instrumentation(disable_instrumentation(), args.trace)
+
+def run_converter(args):
+    """Flusso principale del convertitore (interattivo o batch) con le opzioni già lette."""
+    index_db = (args.index_db or COMPONENT_INDEX_PATH) if args.update_index else None
+    if args.query is not None:
+        # Ricerca nell'indice: non servono dipendenze né cartelle certificati
+        sys.exit(run_component_query(args.query, args.index_db))
+    
+    print("CONVERTITORE CERTIFICATI TXT a PDF")
+    print()
+    
+    # Installa pacchetti necessari
+    print("Controllo dipendenze...")
+    render_jobs = resolve_jobs(args.render_jobs)
+    volume_bytes = int(args.volume_size * 1024 * 1024) if args.volume_size else None
+    required_packages = ['reportlab']
+    if render_jobs > 1 or args.incremental or args.watch or args.profile == 'compact' or args.profile_report:
+        # Necessario per unire i PDF dei singoli blocchi o delle pagine in cache e per il profilo compact
+        required_packages.append('pypdf')
+    if not install_required_packages(required_packages):
+        print("Impossibile installare le dipendenze necessarie.")
+        if args.batch:
+            sys.exit(1)
+        input("Premi INVIO per uscire...")
+        return
+    
+    if args.batch:
+        options = {
+            'diagnose': args.diagnose,
+            'stream': args.stream,
+            'incremental': args.incremental,
+            'renderer': args.renderer,
+            'render_jobs': render_jobs,
+            'profile': args.profile,
+            'volume_pages': args.volume_pages,
+            'volume_bytes': volume_bytes,
+            'prefetch': args.prefetch,
+            'index_db': index_db,
+        }
+        sys.exit(run_batch(args.batch, args.workers, args.report, options))
+    
+    if args.bom:
+        # Dalla distinta base direttamente al PDF, senza cartella Certificati
+        bom_path = Path(args.bom)
+        project_name = args.project_name or bom_path.stem
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        output_path = bom_path.resolve().parent / f"Certificati_{project_name}_{timestamp}.pdf"
+        print(f"\nCreazione PDF: {output_path.name}")
+        success = create_bom_pdf(bom_path, output_path, project_name=project_name, project_path=args.project_path,
+                                 renderer=args.renderer, profile=args.profile)
+        if success:
+            print(f"PDF creato con successo!")
+            print(f"  Percorso: {output_path}")
+        else:
+            print("Errore nella creazione del PDF!")
+        sys.exit(0 if success else 1)
+    
+    print()
+    
+    # Trova la cartella certificati
+    print("Ricerca cartella Certificati...")
+    certificates_folder = find_certificates_folder(max_depth=args.search_depth,
+                                                   ignore_patterns=DISCOVERY_IGNORED_DIRS + args.ignore)
+    
+    if not certificates_folder:
+        print("Cartella 'Certificati' non trovata automaticamente.")
+        print("Vuoi inserire manualmente il percorso della cartella?")
+        choice = input("Inserire percorso manualmente? (s/n): ").lower().strip()
+        
+        if choice == 's':
+            certificates_folder = get_manual_certificates_folder()
+            if not certificates_folder:
+                print("Operazione annullata.")
+                input("Premi INVIO per uscire...")
+                return
+        else:
+            print("Operazione annullata.")
+            print("Assicurati di aver eseguito prima lo script certifica.pas di Altium.")
+            input("Premi INVIO per uscire...")
+            return
+    else:
+        print(f"Cartella trovata automaticamente: {certificates_folder}")
+    
+    if args.watch:
+        # Un solo PDF senza timestamp, riscritto a ogni aggiornamento
+        output_path = certificates_folder.parent / f"Certificati_{certificates_folder.parent.name}.pdf"
+        watch_certificates_folder(certificates_folder, output_path, validate=args.diagnose, renderer=args.renderer,
+                                  profile=args.profile, interval=args.watch_interval, debounce=args.debounce,
+                                  index_db=index_db)
+        return
+    
+    if index_db:
+        update_component_index(certificates_folder, index_db)
+    
+    # Diagnostica dei file
+    print("\nEseguendo diagnostica dei file...")
+    choice = input("Vuoi eseguire la diagnostica completa? (s/n): ").lower().strip()
+    
+    if args.stream or args.incremental:
+        # Diagnostica e conversione nello stesso passaggio, un certificato alla volta
+        output_path = create_output_path(certificates_folder)
+        print(f"\nCreazione PDF: {output_path.name}")
+        print(f"Percorso output: {output_path}")
+        
+        create_pdf = create_incremental_pdf if args.incremental else create_streaming_pdf
+        if create_pdf(certificates_folder, output_path, validate=(choice == 's'), renderer=args.renderer,
+                      profile=args.profile):
+            print(f"PDF creato con successo!")
+            print(f"  Percorso: {output_path}")
+        else:
+            print("Errore nella creazione del PDF!")
+        
+        print()
+        input("Premi INVIO per uscire...")
+        return
+    
+    if choice == 's':
+        valid_files = diagnose_files(certificates_folder, jobs=args.jobs)
+        if not valid_files:
+            print("Nessun file valido trovato dopo la diagnostica!")
+            input("Premi INVIO per uscire...")
+            return
+        certificate_files = valid_files
+    else:
+        # Trova i file certificato normalmente
+        certificate_files = get_certificate_files(certificates_folder)
+    
+    if not certificate_files:
+        print("Nessun file .txt trovato nella cartella Certificati!")
+        print(f"Cartella controllata: {certificates_folder}")
+        input("Premi INVIO per uscire...")
+        return
+    
+    print(f"\nTrovati {len(certificate_files)} certificati da convertire:")
+    for cert_file in certificate_files:
+        print(f"  - {cert_file.name}")
+    
+    print()
+    
+    # Crea il nome del file PDF
+    output_path = create_output_path(certificates_folder)
+    
+    print(f"Creazione PDF: {output_path.name}")
+    print(f"Percorso output: {output_path}")
+    
+    # Crea il PDF unificato
+    if args.profile_report:
+        # Confronto dei profili di output sugli stessi certificati, senza creare il PDF finale
+        compare_output_profiles(certificate_files, renderer=args.renderer, jobs=render_jobs)
+        print()
+        input("Premi INVIO per uscire...")
+        return
+    
+    if create_unified_pdf(certificate_files, output_path, jobs=render_jobs, renderer=args.renderer,
+                          profile=args.profile, volume_pages=args.volume_pages, volume_bytes=volume_bytes,
+                          prefetch=args.prefetch):
         print(f"PDF creato con successo!")
+        if args.volume_pages or volume_bytes:
+            # Si apre il primo volume; l'indice indica dove trovare ogni componente
+            print(f"  Indice: {create_index_path(output_path)}")
+            output_path = create_volume_path(output_path, 1)
         print(f"  Percorso: {output_path}")
         print(f"  Pagine: {len(certificate_files)}")
         
@@ -7,8 +7,68 @@ import sys
 import os
 import time
 import subprocess
+import json
+import re
+import asyncio
+import argparse
+from datetime import datetime
 from pathlib import Path
 
+# Attesa dell'avvio di Altium: timeout complessivo e intervalli di controllo crescenti (secondi)
+ALTIUM_START_TIMEOUT = 60
+READY_POLL_INITIAL = 0.1
+READY_POLL_MAX = 2.0
+READY_POLL_BACKOFF = 1.5
+
+# Senza finestre da interrogare: il processo è pronto quando usa meno di questa
+# frazione di un core per READY_IDLE_POLLS controlli consecutivi
+READY_IDLE_CPU = 0.05
+READY_IDLE_POLLS = 2
+
+# Ricerca dell'installazione di Altium: cartelle standard (sostituibili con la variabile
+# d'ambiente ALTIUM_SEARCH_ROOTS), profondità massima, eseguibili in ordine di preferenza
+ALTIUM_SEARCH_ROOTS = [r"C:\Program Files\Altium", r"C:\Program Files (x86)\Altium"]
+ALTIUM_SEARCH_DEPTH = 3
+ALTIUM_EXECUTABLES = ('x2.exe', 'dxp.exe')
+ALTIUM_PREFERRED_VERSION = '25'
+
+# Coda di script (--queue / --job): nuovi tentativi, attesa tra i tentativi e timeout per job (secondi)
+QUEUE_RETRIES = 2
+QUEUE_RETRY_DELAY = 2.0
+QUEUE_JOB_TIMEOUT = 60
+# Runner simulato (--simulate): durata di ogni script (secondi)
+SIMULATED_SCRIPT_DURATION = 0.2
+
+# Demone (--daemon): chiave condivisa con i client, named pipe su Windows, socket Unix altrove
+DAEMON_KEY_PATH = Path.home() / '.script_manager_daemon.key'
+DAEMON_PIPE_NAME = 'script_manager_altium'
+
+# Fine dello script: main.pas cancella data/running al termine, logger.pas scrive in data/log.txt
+# righe "[dd/mm/yy hh:nn:ss.zzz]: messaggio" (secondi)
+SCRIPT_RUN_TIMEOUT = 600
+MONITOR_POLL_INTERVAL = 0.05
+LOG_LINE_PATTERN = re.compile(r'^\[(\d{2})\D(\d{2})\D(\d{2}) (\d{2})\D(\d{2})\D(\d{2})\.(\d{3})\]:? ?(.*)$')
+
+# Registro persistente delle installazioni trovate
+ALTIUM_REGISTRY_PATH = Path.home() / '.script_manager_altium.json'
+
+# Indice degli script DelphiScript (procedure, forward, progetti), invalidato per dimensione e mtime
+SCRIPT_INDEX_PATH = Path.home() / '.script_manager_script_index.json'
+SCRIPT_INDEX_VERSION = 1
+SCRIPT_EXTENSIONS = ('.pas', '.dfm', '.dpr')
+SCRIPT_PROJECT_EXTENSIONS = ('.prjscr',)
+SCRIPT_IGNORED_DIRS = ('__Previews', 'History', 'Project Logs for *')
+
+# Token DelphiScript: commenti e stringhe vengono riconosciuti solo per essere scartati
+DELPHI_TOKEN_PATTERN = re.compile(r"""
+      (?P<comment>\{[^}]*(?:\}|\Z)|\(\*.*?(?:\*\)|\Z)|//[^\n]*)
+    | (?P<string>'(?:[^'\n]|'')*(?:'|$)|"[^"\n]*(?:"|$))
+    | (?P<word>[A-Za-z_][A-Za-z0-9_]*)
+    | (?P<symbol>[;:().,=\[\]])
+""", re.S | re.M | re.X)
+DELPHI_BLOCK_OPENERS = ('begin', 'try', 'case', 'asm', 'record')
+DELPHI_DIRECTIVES = ('forward', 'overload', 'register', 'stdcall', 'cdecl', 'pascal', 'safecall')
+
 def wait_for_input():
     """Aspetta input dall'utente prima di chiudere."""
     try:
@@ -39,7 +99,9 @@ def find_altium_processes():
     try:
         import psutil
         print("  Cercando processi Altium...")
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
+        # Solo il nome per tutti i processi: il percorso dell'eseguibile costa
+        # l'apertura del processo e viene letto solo per quelli di Altium
+        for proc in psutil.process_iter(['pid', 'name']):
             try:
                 proc_name = proc.info['name']
                 if proc_name:
@@ -47,10 +109,14 @@ def find_altium_processes():
                     # Cerca vari nomi possibili per Altium Designer
                     altium_keywords = ['altium', 'dxp', 'x2', 'designer']
                     if any(keyword in proc_name_lower for keyword in altium_keywords):
+                        try:
+                            proc_exe = proc.exe()
+                        except psutil.AccessDenied:
+                            proc_exe = None
                         altium_processes.append({
                             'pid': proc.info['pid'],
                             'name': proc_name,
-                            'exe': proc.info['exe']
+                            'exe': proc_exe
                         })
                         print(f"    Trovato: {proc_name} (PID: {proc.info['pid']})")
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
@@ -68,47 +134,299 @@ def check_altium_running():
     processes = find_altium_processes()
     return len(processes) > 0
 
-def find_altium_installation():
-    """Trova l'installazione di Altium Designer 25."""
-    print("  Cercando installazione di Altium Designer 25...")
-    
-    # Percorsi comuni per Altium Designer 25
-    possible_paths = [
-        r"C:\Program Files\Altium\AD25\DXP.exe",
-        r"C:\Program Files\Altium\AD25\X2.exe", 
-        r"C:\Program Files (x86)\Altium\AD25\DXP.exe",
-        r"C:\Program Files (x86)\Altium\AD25\X2.exe",
-        r"C:\Program Files\Altium\AltiumDesigner25\DXP.exe",
-        r"C:\Program Files\Altium\AltiumDesigner25\X2.exe",
-        r"C:\Program Files (x86)\Altium\AltiumDesigner25\DXP.exe",
-        r"C:\Program Files (x86)\Altium\AltiumDesigner25\X2.exe",
-    ]
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            print(f"    Trovato: {path}")
-            return path
-    
-    print("    Nessuna installazione standard trovata")
-    
-    # Cerca in altre possibili directory
-    print("  Cercando in altre directory...")
-    search_dirs = [r"C:\Program Files\Altium", r"C:\Program Files (x86)\Altium"]
-    
-    for search_dir in search_dirs:
-        if os.path.exists(search_dir):
-            print(f"    Cercando in: {search_dir}")
+def get_process_tree(process):
+    """Restituisce il processo e tutti i suoi discendenti ancora in esecuzione."""
+    import psutil
+    try:
+        return [process] + process.children(recursive=True)
+    except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+        return []
+
+def find_process_windows(pids):
+    """Elenca le finestre visibili dei processi indicati come (hwnd, pid, titolo).
+    
+    Restituisce None se pywin32 non è disponibile (ad esempio fuori da Windows).
+    """
+    try:
+        import win32gui
+        import win32process
+    except ImportError:
+        return None
+    
+    windows = []
+    
+    def collect(hwnd, _):
+        if win32gui.IsWindowVisible(hwnd):
+            _, pid = win32process.GetWindowThreadProcessId(hwnd)
+            if pid in pids:
+                windows.append((hwnd, pid, win32gui.GetWindowText(hwnd)))
+        return True
+    
+    win32gui.EnumWindows(collect, None)
+    return windows
+
+def process_input_idle(pid):
+    """Indica se il processo ha terminato l'inizializzazione e attende input (WaitForInputIdle)."""
+    import win32api
+    import win32con
+    import win32event
+    
+    handle = win32api.OpenProcess(win32con.PROCESS_QUERY_INFORMATION | win32con.SYNCHRONIZE, False, pid)
+    try:
+        return win32event.WaitForInputIdle(handle, 0) == 0
+    finally:
+        win32api.CloseHandle(handle)
+
+def check_altium_ready(process, state):
+    """Segnale di prontezza di Altium: restituisce 'avvio', 'caricamento', 'inattivo' o 'pronto'.
+    
+    Su Windows Altium è pronto quando ha una finestra principale visibile e il suo
+    ciclo dei messaggi è inattivo; altrimenti quando il consumo di CPU dell'albero
+    dei processi si è fermato. state conserva i dati tra due controlli.
+    """
+    tree = get_process_tree(process)
+    state['tree'] = tree
+    
+    windows = find_process_windows({proc.pid for proc in tree})
+    if windows is not None:
+        main_windows = [window for window in windows if 'altium' in window[2].lower()]
+        if not main_windows:
+            return 'avvio'
+        return 'pronto' if process_input_idle(main_windows[0][1]) else 'caricamento'
+    
+    import psutil
+    cpu_time = 0.0
+    for proc in tree:
+        try:
+            times = proc.cpu_times()
+            cpu_time += times.user + times.system
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            continue
+    
+    now = time.monotonic()
+    previous = state.get('cpu')
+    state['cpu'] = (cpu_time, now)
+    if previous is None:
+        return 'avvio'
+    
+    usage = (cpu_time - previous[0]) / max(now - previous[1], 1e-6)
+    state['idle_polls'] = state.get('idle_polls', 0) + 1 if usage < READY_IDLE_CPU else 0
+    if state['idle_polls'] >= READY_IDLE_POLLS:
+        return 'pronto'
+    # Stato distinto da 'caricamento': il controllo di conferma avviene subito
+    return 'inattivo' if state['idle_polls'] else 'caricamento'
+
+def wait_for_process_ready(pid, check_ready=check_altium_ready, timeout=ALTIUM_START_TIMEOUT,
+                           initial_interval=READY_POLL_INITIAL, max_interval=READY_POLL_MAX,
+                           backoff=READY_POLL_BACKOFF):
+    """Attende che il processo avviato sia pronto, controllando solo il suo PID.
+    
+    L'intervallo tra i controlli parte da initial_interval e cresce di backoff fino a
+    max_interval; torna al minimo ogni volta che lo stato cambia, perché la
+    prontezza è vicina. Se il processo lanciato termina (ad esempio un launcher)
+    si prosegue con un suo discendente ancora attivo. check_ready(processo, state)
+    può essere sostituito, ad esempio per provare il meccanismo con un processo finto.
+    Restituisce un dizionario con esito, PID, stato finale, durata e numero di controlli.
+    """
+    import psutil
+    
+    start_time = time.monotonic()
+    result = {'ready': False, 'pid': pid, 'status': 'avvio', 'elapsed_s': 0.0, 'polls': 0}
+    state = {}
+    interval = initial_interval
+    
+    try:
+        process = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        result['status'] = 'terminato'
+        return result
+    
+    while True:
+        try:
+            alive = process.is_running() and process.status() != psutil.STATUS_ZOMBIE
+        except psutil.NoSuchProcess:
+            alive = False
+        if not alive:
+            survivors = [proc for proc in state.get('tree', []) if proc.pid != process.pid and proc.is_running()]
+            if not survivors:
+                result['status'] = 'terminato'
+                break
+            process = survivors[0]
+            result['pid'] = process.pid
+            state.pop('cpu', None)
+        
+        try:
+            status = check_ready(process, state)
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            status = 'avvio'
+        result['polls'] += 1
+        
+        if status == 'pronto':
+            result['ready'] = True
+            result['status'] = status
+            break
+        
+        # Stato cambiato: si torna a controllare spesso, altrimenti si rallenta
+        interval = initial_interval if status != result['status'] else min(interval * backoff, max_interval)
+        result['status'] = status
+        
+        remaining = timeout - (time.monotonic() - start_time)
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+    
+    result['elapsed_s'] = round(time.monotonic() - start_time, 3)
+    return result
+
+def get_altium_search_roots():
+    """Cartelle in cui cercare Altium: variabile ALTIUM_SEARCH_ROOTS (separate da os.pathsep) o quelle standard."""
+    roots = os.environ.get('ALTIUM_SEARCH_ROOTS')
+    if roots:
+        return [root for root in roots.split(os.pathsep) if root]
+    return list(ALTIUM_SEARCH_ROOTS)
+
+def get_executable_version(path):
+    """Restituisce la versione dell'eseguibile come lista di interi.
+    
+    Usa le informazioni di versione del file se pywin32 è disponibile, altrimenti
+    i numeri nel nome delle cartelle (es. AD25 -> [25], AltiumDesigner24.3 -> [24, 3]).
+    """
+    try:
+        import win32api
+        info = win32api.GetFileVersionInfo(str(path), '\\')
+        ms, ls = info['FileVersionMS'], info['FileVersionLS']
+        return [ms >> 16, ms & 0xFFFF, ls >> 16, ls & 0xFFFF]
+    except Exception:
+        pass
+    
+    for part in reversed(Path(path).parent.parts):
+        match = re.search(r'(?:AD|Designer|Altium)\s*(\d+(?:\.\d+)*)', part, re.IGNORECASE)
+        if match:
+            return [int(number) for number in match.group(1).split('.')]
+    return []
+
+def scan_altium_installations(search_roots, max_depth=ALTIUM_SEARCH_DEPTH):
+    """Cerca gli eseguibili di Altium (X2.exe, DXP.exe) fino a max_depth livelli sotto le cartelle indicate."""
+    installations = []
+    for root_rank, root in enumerate(search_roots):
+        print(f"    Cercando in: {root}")
+        pending = [(root, 0)]
+        while pending:
+            directory, depth = pending.pop()
             try:
-                for root, dirs, files in os.walk(search_dir):
-                    for file in files:
-                        if file.lower() in ['dxp.exe', 'x2.exe']:
-                            full_path = os.path.join(root, file)
-                            print(f"    Trovato: {full_path}")
-                            return full_path
-            except Exception as e:
-                print(f"    Errore nella ricerca: {e}")
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            if depth < max_depth:
+                                pending.append((entry.path, depth + 1))
+                        elif entry.name.lower() in ALTIUM_EXECUTABLES:
+                            stat = entry.stat()
+                            installations.append({
+                                'path': entry.path,
+                                'version': get_executable_version(entry.path),
+                                'mtime': stat.st_mtime_ns,
+                                'size': stat.st_size,
+                                'root_rank': root_rank,
+                            })
+            except OSError:
+                continue
+    return installations
+
+def select_altium_installation(installations, preferred_version=None):
+    """Sceglie in modo deterministico l'installazione da usare.
     
-    return None
+    Ordine: versione principale uguale a preferred_version, versione nota prima di
+    quella sconosciuta, versione più alta (24.1 dopo 24.3 e prima di 24),
+    X2.exe prima di DXP.exe, ordine delle cartelle di ricerca, infine percorso
+    in ordine alfabetico.
+    """
+    def preference(installation):
+        version = installation['version']
+        preferred = bool(preferred_version) and bool(version) and str(version[0]) == str(preferred_version)
+        executable_rank = ALTIUM_EXECUTABLES.index(Path(installation['path']).name.lower())
+        # Il termine finale fa passare 25.3 davanti a 25: a parità di prefisso vince la versione più lunga
+        version_key = tuple(-number for number in version) + (1,)
+        return (not preferred, not version, version_key, executable_rank,
+                installation.get('root_rank', 0), installation['path'].lower())
+    
+    return min(installations, key=preference) if installations else None
+
+def get_root_mtimes(search_roots):
+    """Data di modifica di ogni cartella di ricerca (None se non esiste)."""
+    mtimes = {}
+    for root in search_roots:
+        try:
+            mtimes[root] = os.stat(root).st_mtime_ns
+        except OSError:
+            mtimes[root] = None
+    return mtimes
+
+def load_altium_registry():
+    """Carica il registro delle installazioni di Altium già trovate."""
+    try:
+        with open(ALTIUM_REGISTRY_PATH, 'r', encoding='utf-8') as f:
+            registry = json.load(f)
+        return registry if isinstance(registry, dict) else {}
+    except Exception:
+        return {}
+
+def save_altium_registry(registry):
+    """Salva il registro delle installazioni (errori ignorati: è solo una cache)."""
+    try:
+        temp_path = ALTIUM_REGISTRY_PATH.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(registry, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, ALTIUM_REGISTRY_PATH)
+    except Exception:
+        pass
+
+def find_altium_installation(search_roots=None, preferred_version=None, use_cache=True):
+    """Trova l'installazione di Altium Designer da usare (di preferenza la 25).
+    
+    Il risultato viene salvato nel registro con versione e data di modifica; alle
+    esecuzioni successive basta verificare l'eseguibile scelto e le cartelle di
+    ricerca: la scansione si ripete solo se l'eseguibile è cambiato o sparito, o se
+    nelle cartelle di ricerca è stato installato o rimosso qualcosa.
+    """
+    search_roots = search_roots or get_altium_search_roots()
+    preferred_version = preferred_version or os.environ.get('ALTIUM_VERSION', ALTIUM_PREFERRED_VERSION)
+    print(f"  Cercando installazione di Altium Designer {preferred_version}...")
+    
+    if use_cache:
+        registry = load_altium_registry()
+        selected = registry.get('selected')
+        if (selected and registry.get('roots') == search_roots
+                and registry.get('preferred_version') == preferred_version
+                and registry.get('root_mtimes') == get_root_mtimes(search_roots)):
+            try:
+                if os.stat(selected['path']).st_mtime_ns == selected['mtime']:
+                    print(f"    Trovato (registro): {selected['path']}")
+                    return selected['path']
+            except OSError:
+                pass
+            print("    Registro non più valido: nuova ricerca")
+    
+    root_mtimes = get_root_mtimes(search_roots)
+    installations = scan_altium_installations(search_roots)
+    selected = select_altium_installation(installations, preferred_version)
+    
+    if use_cache:
+        save_altium_registry({
+            'roots': search_roots,
+            'preferred_version': preferred_version,
+            'root_mtimes': root_mtimes,
+            'installations': installations,
+            'selected': selected,
+        })
+    
+    if not selected:
+        print("    Nessuna installazione trovata")
+        return None
+    
+    if len(installations) > 1:
+        print(f"    Installazioni trovate: {len(installations)}")
+    print(f"    Trovato: {selected['path']} (versione {'.'.join(map(str, selected['version'])) or 'sconosciuta'})")
+    return selected['path']
 
 def launch_altium():
     """Avvia Altium Designer."""
@@ -121,23 +439,24 @@ def launch_altium():
     
     try:
         print(f"  Avviando: {altium_path}")
-        # Avvia Altium in background
-        subprocess.Popen([altium_path], shell=True)
+        # Avvia Altium in background senza shell, così il PID è quello di Altium
+        process = subprocess.Popen([altium_path])
         
-        print("  Attendendo l'avvio di Altium Designer...")
-        # Aspetta fino a 60 secondi che Altium si avvii
-        for i in range(60):
-            time.sleep(1)
-            if check_altium_running():
-                print(f"  Altium Designer avviato con successo! (dopo {i+1} secondi)")
-                # Aspetta altri 5 secondi per essere sicuri che sia completamente caricato
-                print("  Aspettando il caricamento completo...")
-                time.sleep(5)
-                return True
-            if i % 10 == 9:  # Stampa un messaggio ogni 10 secondi
-                print(f"  Ancora in attesa... ({i+1}/60 secondi)")
+        print(f"  Attendendo l'avvio di Altium Designer (PID: {process.pid})...")
+        result = wait_for_process_ready(process.pid)
+        if result['status'] == 'terminato':
+            # Il processo lanciato era solo un launcher: segui il processo Altium vero
+            altium_processes = find_altium_processes()
+            if altium_processes:
+                result = wait_for_process_ready(altium_processes[0]['pid'])
+        if result['ready']:
+            print(f"  Altium Designer pronto! (dopo {result['elapsed_s']:.1f} secondi, PID: {result['pid']})")
+            return True
         
-        print("  Timeout: Altium potrebbe non essersi avviato completamente.")
+        if result['status'] == 'terminato':
+            print("  Il processo di Altium è terminato durante l'avvio.")
+        else:
+            print(f"  Timeout: Altium potrebbe non essersi avviato completamente (stato: {result['status']}).")
         return False
         
     except Exception as e:
@@ -151,27 +470,267 @@ def find_scripts_directory():
     
     return scripts_dir if scripts_dir.exists() else None
 
-def list_available_scripts():
-    """Elenca tutti gli script DelphiScript disponibili nella cartella Scripts."""
-    scripts_dir = find_scripts_directory()
+def tokenize_delphiscript(source):
+    """Divide il sorgente DelphiScript in token (tipo, testo, riga), senza commenti e stringhe."""
+    line = 1
+    last_pos = 0
+    for match in DELPHI_TOKEN_PATTERN.finditer(source):
+        kind = match.lastgroup
+        line += source.count('\n', last_pos, match.start())
+        last_pos = match.start()
+        if kind in ('word', 'symbol'):
+            yield kind, match.group(), line
+
+def parse_delphiscript(source):
+    """Elenca procedure e funzioni dichiarate nel sorgente.
     
+    Ogni routine è un dizionario con nome (nella grafia originale), tipo, riga,
+    presenza di parametri, dichiarazione forward e annidamento in un'altra routine.
+    """
+    tokens = list(tokenize_delphiscript(source))
+    routines = []
+    open_routines = []  # routine definite di cui si attende la fine del corpo (la più interna in cima)
+    depth = 0
+    i = 0
+    
+    while i < len(tokens):
+        kind, text, line = tokens[i]
+        lower = text.lower()
+        
+        if kind == 'word' and lower in ('procedure', 'function'):
+            previous = tokens[i - 1][1] if i else ''
+            if previous in ('=', ':') or i + 1 >= len(tokens) or tokens[i + 1][0] != 'word':
+                # Tipo procedurale (TProc = procedure ...), non una dichiarazione
+                i += 1
+                continue
+            
+            name = tokens[i + 1][1]
+            j = i + 2
+            while j + 1 < len(tokens) and tokens[j][1] == '.' and tokens[j + 1][0] == 'word':
+                name += '.' + tokens[j + 1][1]
+                j += 2
+            
+            has_params = False
+            paren_depth = 0
+            while j < len(tokens) and not (tokens[j][1] == ';' and paren_depth == 0):
+                if tokens[j][1] == '(':
+                    if paren_depth == 0 and j + 1 < len(tokens) and tokens[j + 1][1] != ')':
+                        has_params = True
+                    paren_depth += 1
+                elif tokens[j][1] == ')':
+                    paren_depth = max(0, paren_depth - 1)
+                j += 1
+            
+            # Direttive dopo il ';' dell'intestazione (forward; overload; ...)
+            directives = []
+            while j + 1 < len(tokens) and tokens[j + 1][1].lower() in DELPHI_DIRECTIVES:
+                directives.append(tokens[j + 1][1].lower())
+                j += 2 if j + 2 < len(tokens) and tokens[j + 2][1] == ';' else 1
+            
+            routine = {
+                'name': name,
+                'kind': lower,
+                'line': line,
+                'params': has_params,
+                'forward': 'forward' in directives,
+                'nested': bool(open_routines) or depth > 0,
+            }
+            routines.append(routine)
+            if not routine['forward']:
+                open_routines.append(routine)
+            i = j + 1
+            continue
+        
+        if kind == 'word':
+            if lower in ('interface', 'implementation'):
+                # Intestazioni della sezione interface: non hanno corpo
+                open_routines.clear()
+            elif lower in DELPHI_BLOCK_OPENERS:
+                depth += 1
+            elif lower == 'end':
+                depth = max(0, depth - 1)
+                if depth == 0 and open_routines:
+                    # Chiuso il corpo della routine più interna ancora aperta
+                    open_routines.pop()
+        i += 1
+    
+    return routines
+
+def choose_entry_point(routines):
+    """Sceglie la procedura da avviare tra quelle dichiarate nello script.
+    
+    Preferisce la prima procedura senza parametri annunciata con forward (in questi
+    script è la convenzione per il punto d'ingresso), poi l'ultima procedura senza
+    parametri di primo livello, infine la prima routine definita.
+    """
+    defined = [r for r in routines if not r['forward']]
+    candidates = [r for r in defined
+                  if r['kind'] == 'procedure' and not r['params'] and not r['nested'] and '.' not in r['name']]
+    forwarded = [r['name'].lower() for r in routines if r['forward'] and not r['params']]
+    
+    for name in forwarded:
+        for routine in candidates:
+            if routine['name'].lower() == name:
+                return routine['name']
+    if candidates:
+        return candidates[-1]['name']
+    return defined[0]['name'] if defined else None
+
+def read_script_source(path):
+    """Legge un sorgente DelphiScript (UTF-8 o, per i file salvati da Altium, cp1252)."""
+    data = Path(path).read_bytes()
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('cp1252', errors='replace')
+
+def parse_script_project(project_path):
+    """Restituisce i percorsi assoluti dei documenti elencati in un progetto .PrjScr."""
+    documents = []
+    project_dir = Path(project_path).parent
+    for match in re.finditer(r'^\s*(?:DocumentPath|Document\d+)\s*=\s*(.+?)\s*$',
+                             read_script_source(project_path), re.M | re.I):
+        document = project_dir / match.group(1).replace('\\', '/')
+        document_key = os.path.normcase(os.path.normpath(str(document)))
+        if document_key not in documents:
+            documents.append(document_key)
+    return documents
+
+def iter_script_files(scripts_dir):
+    """Percorre ricorsivamente la cartella Scripts restituendo script e progetti."""
+    from fnmatch import fnmatch
+    pending = [str(scripts_dir)]
+    while pending:
+        try:
+            entries = list(os.scandir(pending.pop()))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                if not any(fnmatch(entry.name, pattern) for pattern in SCRIPT_IGNORED_DIRS):
+                    pending.append(entry.path)
+            elif entry.name.lower().endswith(SCRIPT_EXTENSIONS + SCRIPT_PROJECT_EXTENSIONS):
+                yield entry
+
+def load_script_index():
+    """Carica l'indice degli script salvato in precedenza."""
+    try:
+        with open(SCRIPT_INDEX_PATH, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if isinstance(index, dict) and index.get('version') == SCRIPT_INDEX_VERSION:
+            return index
+    except Exception:
+        pass
+    return {'version': SCRIPT_INDEX_VERSION, 'files': {}}
+
+def save_script_index(index):
+    """Salva l'indice degli script (errori ignorati: è solo una cache)."""
+    try:
+        temp_path = SCRIPT_INDEX_PATH.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, SCRIPT_INDEX_PATH)
+    except Exception:
+        pass
+
+def index_script_file(path, stat_result, cached_files):
+    """Restituisce la voce d'indice di un file, rianalizzandolo solo se è cambiato."""
+    key = os.path.normcase(os.path.abspath(path))
+    cached = cached_files.get(key)
+    if cached and cached.get('size') == stat_result.st_size and cached.get('mtime') == stat_result.st_mtime_ns:
+        return key, cached, False
+    
+    entry = {'path': os.path.abspath(path), 'size': stat_result.st_size, 'mtime': stat_result.st_mtime_ns}
+    try:
+        if path.lower().endswith(SCRIPT_PROJECT_EXTENSIONS):
+            entry['documents'] = parse_script_project(path)
+        else:
+            entry['routines'] = parse_delphiscript(read_script_source(path))
+            entry['entry_point'] = choose_entry_point(entry['routines'])
+    except Exception as e:
+        entry['error'] = str(e)
+    return key, entry, True
+
+def build_script_index(scripts_dir=None, use_cache=True):
+    """Indicizza gli script della cartella Scripts e delle sue sottocartelle.
+    
+    Restituisce un dizionario percorso -> voce con routine, punto d'ingresso e
+    progetti .PrjScr che includono lo script. I file invariati (stessa dimensione e
+    mtime) vengono letti dall'indice salvato senza rianalizzarli.
+    """
+    scripts_dir = scripts_dir or find_scripts_directory()
     if not scripts_dir:
-        return []
+        return {}
     
-    # Cerca file con estensioni DelphiScript comuni
-    script_extensions = ['*.pas', '*.dfm', '*.dpr']
-    scripts = []
+    index = load_script_index() if use_cache else {'version': SCRIPT_INDEX_VERSION, 'files': {}}
+    cached_files = index['files']
+    files = {}
+    changed = False
     
-    for extension in script_extensions:
-        scripts.extend(scripts_dir.glob(extension))
+    for entry in iter_script_files(scripts_dir):
+        try:
+            stat_result = entry.stat()
+        except OSError:
+            continue
+        key, info, parsed = index_script_file(entry.path, stat_result, cached_files)
+        files[key] = info
+        changed = changed or parsed
+    
+    # Appartenenza ai progetti, ricalcolata ogni volta dalle voci dei .PrjScr
+    scripts = {key: dict(info, projects=[]) for key, info in files.items() if 'documents' not in info}
+    for key, info in files.items():
+        for document in info.get('documents', []):
+            if document in scripts:
+                scripts[document]['projects'].append(info['path'])
     
-    # Ordina alfabeticamente
-    scripts.sort(key=lambda x: x.name.lower())
+    # Le voci delle altre cartelle restano nell'indice; quelle dei file rimossi no
+    root_key = os.path.normcase(os.path.abspath(scripts_dir)) + os.sep
+    for key in list(cached_files):
+        if key.startswith(root_key) and key not in files:
+            del cached_files[key]
+            changed = True
+    if changed or not use_cache:
+        cached_files.update(files)
+        save_script_index(index)
+    
+    return scripts
+
+def get_script_info(script_path):
+    """Restituisce la voce d'indice di un singolo script (senza progetti)."""
+    path = os.path.abspath(script_path)
+    index = load_script_index()
+    key, info, parsed = index_script_file(path, os.stat(path), index['files'])
+    if parsed:
+        index['files'][key] = info
+        save_script_index(index)
+    return info
+
+def list_available_scripts(scripts_dir=None):
+    """Elenca tutti gli script DelphiScript disponibili nella cartella Scripts e nelle sottocartelle.
+    
+    Restituisce le voci dell'indice (vedi build_script_index) con in più il percorso
+    relativo alla cartella Scripts in 'label', ordinate per percorso relativo.
+    """
+    scripts_dir = scripts_dir or find_scripts_directory()
+    
+    if not scripts_dir:
+        return []
+    
+    scripts = [dict(info, label=Path(info['path']).relative_to(scripts_dir).as_posix())
+               for info in build_script_index(scripts_dir).values()]
+    
+    # Ordina alfabeticamente per percorso relativo
+    scripts.sort(key=lambda info: info['label'].lower())
     
     return scripts
 
 def display_script_menu(scripts):
-    """Visualizza il menu degli script disponibili."""
+    """Visualizza il menu degli script elencati da list_available_scripts e ne restituisce i percorsi.
+    
+    Usa le voci d'indice già lette, senza una nuova scansione della cartella Scripts.
+    """
     print("\n" + "="*60)
     print("SELETTORE SCRIPT ALTIUM DESIGNER")
     print("="*60)
@@ -183,14 +742,17 @@ def display_script_menu(scripts):
     print(f"Script disponibili ({len(scripts)} trovati):")
     print("-" * 40)
     
-    for i, script in enumerate(scripts):
-        print(f"  {i:2}. {script.name}")
+    for i, info in enumerate(scripts):
+        details = info.get('entry_point') or ''
+        if info.get('projects'):
+            details += f" [{', '.join(Path(project).name for project in info['projects'])}]"
+        print(f"  {i:2}. {info['label']}" + (f"  -> {details}" if details else ""))
     
     print("-" * 40)
     print("  q. Esci dal programma")
     print()
     
-    return scripts
+    return [Path(info['path']) for info in scripts]
 
 def get_user_selection(max_index):
     """Ottiene la selezione dell'utente."""
@@ -214,33 +776,163 @@ def get_user_selection(max_index):
             return None
 
 def extract_function_name(script_path):
-    """Estrae il nome della funzione principale dal file script."""
+    """Estrae il nome della funzione principale dal file script.
+    
+    Usa l'indice degli script: il tokenizer ignora commenti e stringhe e il punto
+    d'ingresso è scelto con choose_entry_point().
+    """
     try:
-        with open(script_path, 'r', encoding='utf-8') as file:
-            content = file.read().lower()
-            
-            # Cerca pattern comuni per funzioni DelphiScript
-            import re
-            
-            # Cerca "procedure NomeFunzione" o "function NomeFunzione"
-            patterns = [
-                r'procedure\s+(\w+)',
-                r'function\s+(\w+)',
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, content)
-                if matches:
-                    # Prendi la prima funzione trovata (di solito è quella principale)
-                    return matches[0]
-            
-            # Se non trova niente, usa il nome del file senza estensione
-            return script_path.stem
+        info = get_script_info(script_path)
+        if info.get('error'):
+            raise ValueError(info['error'])
+        
+        # Se non trova niente, usa il nome del file senza estensione
+        return info.get('entry_point') or script_path.stem
             
     except Exception as e:
         print(f"  Avviso: impossibile leggere il file script ({e}). Uso il nome del file.")
         return script_path.stem
 
+def parse_log_line(line):
+    """Separa timestamp e messaggio di una riga di log.txt (timestamp None se assente)."""
+    match = LOG_LINE_PATTERN.match(line)
+    if not match:
+        return None, line
+    day, month, year, hour, minute, second, millis, message = match.groups()
+    try:
+        timestamp = datetime(2000 + int(year), int(month), int(day), int(hour), int(minute),
+                             int(second), int(millis) * 1000)
+    except ValueError:
+        return None, line
+    return timestamp, message
+
+def read_new_log_lines(log_path, state):
+    """Legge solo le righe aggiunte a log.txt dall'ultima lettura.
+    
+    state conserva l'offset in byte e l'eventuale riga incompleta; se il file è stato
+    svuotato (clear_log_file) la lettura riparte dall'inizio.
+    """
+    try:
+        size = os.path.getsize(log_path)
+    except OSError:
+        return []
+    if size < state['offset']:
+        state['offset'] = 0
+        state['partial'] = b''
+    if size == state['offset']:
+        return []
+    
+    with open(log_path, 'rb') as f:
+        f.seek(state['offset'])
+        data = f.read(size - state['offset'])
+    state['offset'] += len(data)
+    
+    # L'ultima riga senza a capo potrebbe essere ancora in scrittura
+    lines = (state['partial'] + data).split(b'\n')
+    state['partial'] = lines.pop()
+    return [parse_log_line(line.rstrip(b'\r').decode('cp1252', errors='replace')) for line in lines]
+
+async def tail_log_file(log_path, state, finished, on_line=None, interval=MONITOR_POLL_INTERVAL):
+    """Segue log.txt finché finished non è impostato, registrando le righe in state['lines']."""
+    while True:
+        done = finished.is_set()
+        for timestamp, message in read_new_log_lines(log_path, state):
+            state['lines'].append((timestamp, message))
+            if on_line:
+                on_line(timestamp, message)
+        if done:
+            return
+        await asyncio.sleep(interval)
+
+async def wait_for_sentinel(sentinel_path, timeout, interval=MONITOR_POLL_INTERVAL):
+    """Attende la cancellazione del file sentinella; restituisce False allo scadere del timeout."""
+    deadline = time.perf_counter() + timeout
+    while os.path.exists(sentinel_path):
+        if time.perf_counter() >= deadline:
+            return False
+        await asyncio.sleep(interval)
+    return True
+
+async def monitor_script_completion(data_dir, dispatched_at, timeout=SCRIPT_RUN_TIMEOUT, log_state=None,
+                                    on_line=None, interval=MONITOR_POLL_INTERVAL):
+    """Attende la fine dello script seguendo in parallelo sentinella e log.
+    
+    Restituisce un dizionario con stato ('completato' o 'timeout'), istanti di invio,
+    inizio e fine, latenza di avvio, durata dello script e righe di log lette.
+    """
+    data_dir = Path(data_dir)
+    state = log_state or {'offset': 0, 'partial': b''}
+    state.setdefault('lines', [])
+    finished = asyncio.Event()
+    tail = asyncio.ensure_future(tail_log_file(data_dir / 'log.txt', state, finished, on_line, interval))
+    try:
+        completed = await wait_for_sentinel(data_dir / 'running', timeout, interval)
+    finally:
+        # Un'ultima lettura raccoglie le righe scritte subito prima della fine
+        finished.set()
+        await tail
+    observed_at = datetime.now()
+    
+    finished_at = None
+    if completed:
+        # La cancellazione della sentinella aggiorna la data di modifica della cartella:
+        # è un istante più preciso dell'intervallo di controllo
+        try:
+            changed_at = datetime.fromtimestamp(os.stat(data_dir).st_mtime)
+            finished_at = changed_at if dispatched_at <= changed_at <= observed_at else observed_at
+        except OSError:
+            finished_at = observed_at
+    
+    timestamps = [timestamp for timestamp, message in state['lines'] if timestamp]
+    started_at = timestamps[0] if timestamps else None
+    return {
+        'status': 'completato' if completed else 'timeout',
+        'dispatched_at': dispatched_at.isoformat(timespec='milliseconds'),
+        'started_at': started_at.isoformat(timespec='milliseconds') if started_at else None,
+        'finished_at': finished_at.isoformat(timespec='milliseconds') if finished_at else None,
+        # Il log ha la risoluzione del millisecondo: la latenza non può risultare negativa
+        'start_latency_s': round(max(0.0, (started_at - dispatched_at).total_seconds()), 3) if started_at else None,
+        'script_s': round((finished_at - started_at).total_seconds(), 3) if started_at and finished_at else None,
+        'total_s': round(((finished_at or observed_at) - dispatched_at).total_seconds(), 3),
+        'log_lines': len(state['lines']),
+        'last_message': state['lines'][-1][1] if state['lines'] else None,
+    }
+
+def dispatch_script(runner):
+    """Passa lo script ad Altium senza attenderne la fine.
+    
+    Restituisce (cartella dei dati, stato del log, istante di invio) da passare a
+    monitor_script_completion. Se solleva un'eccezione il comando non è stato inviato.
+    """
+    data_dir = Path(runner.get_scripting_project_path()) / 'data'
+    log_path = data_dir / 'log.txt'
+    
+    # Si parte dalla fine del log attuale: le righe precedenti non vengono rilette
+    try:
+        log_state = {'offset': os.path.getsize(log_path), 'partial': b''}
+    except OSError:
+        log_state = {'offset': 0, 'partial': b''}
+    
+    dispatched_at = datetime.now()
+    runner.run(wait_until_finished=False)
+    return data_dir, log_state, dispatched_at
+
+def run_monitored_script(runner, timeout=SCRIPT_RUN_TIMEOUT, on_line=None):
+    """Avvia lo script con PyAltiumRun senza la sua attesa e ne segue sentinella e log.
+    
+    run() di PyAltiumRun considera finito lo script anche quando termina solo il
+    processo lanciato, che con Altium già aperto esce subito dopo aver passato il comando.
+    """
+    data_dir, log_state, dispatched_at = dispatch_script(runner)
+    return asyncio.run(monitor_script_completion(data_dir, dispatched_at, timeout, log_state, on_line))
+
+def print_log_line(timestamp, message):
+    """Mostra una riga del log di Altium appena viene scritta."""
+    if timestamp:
+        print(f"    [{timestamp:%H:%M:%S}.{timestamp.microsecond // 1000:03}] {message}")
+    else:
+        print(f"    {message}")
+
 def execute_selected_script(script_path):
     """Esegue lo script DelphiScript selezionato."""
     print(f"\nEsecuzione dello script: {script_path.name}")
@@ -268,10 +960,16 @@ def execute_selected_script(script_path):
         runner.set_function(function_name)
         print(f"  Funzione impostata: {function_name}")
         
-        # Esegui lo script
+        # Esegui lo script e attendi la cancellazione della sentinella
         print("  Invio comandi ad Altium Designer...")
-        runner.run()
+        completion = run_monitored_script(runner, SCRIPT_RUN_TIMEOUT, on_line=print_log_line)
         
+        if completion['status'] != 'completato':
+            print(f"  Script non terminato entro {SCRIPT_RUN_TIMEOUT} secondi.")
+            return False
+        
+        if completion['start_latency_s'] is not None:
+            print(f"  Avvio dopo {completion['start_latency_s']:.3f}s, durata {completion['script_s']:.3f}s")
         print("  Script eseguito con successo!")
         
     except Exception as e:
@@ -280,7 +978,483 @@ def execute_selected_script(script_path):
     
     return True
 
-def main():
+class SimulatedAltiumRun:
+    """Sostituto di AltiumRun per provare la coda senza Altium (opzione --simulate).
+    
+    Come PyAltiumRun, run() crea la sentinella data/running nella cartella del
+    progetto di scripting; un thread fa le veci di Altium, scrive il log e cancella
+    la sentinella a fine script, così la fine viene rilevata dallo stesso monitor
+    usato con Altium. Per ogni funzione, failures indica quanti invii devono fallire
+    prima di raggiungere Altium (errore ritentato) e timeouts quante esecuzioni non
+    devono terminare (la sentinella resta, errore non ritentato).
+    """
+    
+    def __init__(self, failures=None, timeouts=None, use_internal_logger=True, duration=SIMULATED_SCRIPT_DURATION):
+        import tempfile
+        self.failures = dict(failures or {})
+        self.timeouts = dict(timeouts or {})
+        self.duration = duration
+        self.use_internal_logger = use_internal_logger
+        # Rimossa automaticamente all'uscita del programma
+        self.project_dir = tempfile.TemporaryDirectory(prefix='script_manager_simulazione_')
+        os.makedirs(os.path.join(self.project_dir.name, 'data'))
+        self.scripts = []
+        self.project = None
+        self.function = None
+        self.calls = []
+    
+    def get_scripting_project_path(self):
+        return self.project_dir.name
+    
+    def get_log_file_path(self):
+        if not self.use_internal_logger:
+            return None
+        return os.path.join(self.project_dir.name, 'data', 'log.txt')
+    
+    def clear_log_file(self):
+        self.calls.append(('clear_log_file',))
+        if self.use_internal_logger:
+            open(self.get_log_file_path(), 'w').close()
+    
+    def clear_scripts(self):
+        self.scripts.clear()
+    
+    def add_script(self, script_path):
+        self.scripts.append(script_path)
+    
+    def set_project_to_open(self, project_path):
+        self.project = project_path
+    
+    def set_function(self, function_name, *args):
+        self.function = function_name
+    
+    def write_log(self, message):
+        """Aggiunge una riga a log.txt nel formato di logger.pas."""
+        if not self.use_internal_logger:
+            return
+        now = datetime.now()
+        line = f"[{now:%d/%m/%y %H:%M:%S}.{now.microsecond // 1000:03}]: {message}\r\n"
+        with open(self.get_log_file_path(), 'ab') as f:
+            f.write(line.encode('cp1252', errors='replace'))
+    
+    def execute(self, function_name, sentinel_path, finishes):
+        """Esecuzione dello script al posto di Altium (nel thread avviato da run)."""
+        try:
+            self.write_log('Starting script')
+            time.sleep(self.duration)
+            if not finishes:
+                return
+            self.write_log(f"{function_name} eseguita")
+            print(f"    [simulazione] {function_name} eseguita")
+            os.remove(sentinel_path)
+        except OSError:
+            pass  # Cartella del progetto già rimossa all'uscita
+    
+    def run(self, wait_until_finished=True, timeout=10):
+        import threading
+        if self.failures.get(self.function, 0) > 0:
+            self.failures[self.function] -= 1
+            raise OSError(f"[simulazione] avvio di Altium non riuscito per {self.function}")
+        self.calls.append(('run', self.function, list(self.scripts), self.project))
+        finishes = self.timeouts.get(self.function, 0) <= 0
+        if not finishes:
+            self.timeouts[self.function] -= 1
+        
+        sentinel_path = os.path.join(self.project_dir.name, 'data', 'running')
+        open(sentinel_path, 'w').close()
+        worker = threading.Thread(target=self.execute, args=(self.function, sentinel_path, finishes), daemon=True)
+        worker.start()
+        if wait_until_finished:
+            worker.join(timeout)
+            return not os.path.exists(sentinel_path)
+        return True
+
+def parse_job_file(job_file):
+    """Legge la coda di job da file.
+    
+    Formato JSON: lista di oggetti {"script", "function", "project", "timeout"}.
+    Formato testo: una riga per job "script;funzione;progetto" (funzione e progetto
+    facoltativi), righe vuote e commenti con # ignorati.
+    """
+    job_file = Path(job_file)
+    text = job_file.read_text(encoding='utf-8')
+    if job_file.suffix.lower() == '.json':
+        return [dict(job) for job in json.loads(text)]
+    
+    jobs = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = [field.strip() for field in line.split(';')] + ['', '']
+        jobs.append({'script': fields[0], 'function': fields[1] or None, 'project': fields[2] or None})
+    return jobs
+
+def resolve_script_path(script):
+    """Restituisce il percorso dello script, cercandolo anche nella cartella Scripts."""
+    script_path = Path(script)
+    if not script_path.exists() and not script_path.is_absolute():
+        scripts_dir = find_scripts_directory()
+        if scripts_dir and (scripts_dir / script_path).exists():
+            script_path = scripts_dir / script_path
+    return script_path.absolute()
+
+def run_queued_job(runner, job, retries=QUEUE_RETRIES, retry_delay=QUEUE_RETRY_DELAY):
+    """Esegue un job con il runner condiviso, ripetendolo in caso di errori temporanei.
+    
+    Si ritenta, con attesa crescente, solo se il comando non ha raggiunto Altium
+    (eccezione prima o durante l'invio). Dopo l'invio un timeout o un errore non
+    vengono ritentati: lo script potrebbe essere in esecuzione e verrebbe eseguito
+    due volte. Script mancanti non vengono ritentati. Restituisce il report del job.
+    """
+    start_time = time.perf_counter()
+    script_path = resolve_script_path(job['script'])
+    report = {
+        'script': str(script_path),
+        'function': job.get('function'),
+        'project': job.get('project'),
+        'status': 'errore',
+        'attempts': 0,
+        'dispatch_ms': None,
+        'start_latency_s': None,
+        'script_s': None,
+        'duration_s': 0.0,
+        'error': None,
+    }
+    
+    if not script_path.is_file():
+        report['error'] = f"Script non trovato: {job['script']}"
+        return report
+    
+    report['function'] = report['function'] or extract_function_name(script_path)
+    timeout = job.get('timeout') or QUEUE_JOB_TIMEOUT
+    
+    for attempt in range(1, retries + 2):
+        report['attempts'] = attempt
+        dispatched = False
+        try:
+            # Il runner è lo stesso per tutti i job: si cambiano solo script, progetto e funzione
+            runner.clear_scripts()
+            runner.add_script(str(script_path))
+            runner.set_project_to_open(report['project'])
+            runner.set_function(report['function'])
+            if report['dispatch_ms'] is None:
+                # Tempo dalla ricezione del job all'invio ad Altium
+                report['dispatch_ms'] = round((time.perf_counter() - start_time) * 1000, 3)
+            # Fine rilevata dalla sentinella e tempi presi dal log, con Altium e in simulazione
+            data_dir, log_state, dispatched_at = dispatch_script(runner)
+            dispatched = True
+            completion = asyncio.run(monitor_script_completion(data_dir, dispatched_at, timeout, log_state))
+            report['start_latency_s'] = completion['start_latency_s']
+            report['script_s'] = completion['script_s']
+            if completion['status'] == 'completato':
+                report['status'] = 'ok'
+                report['error'] = None
+            else:
+                report['status'] = 'timeout'
+                report['error'] = f"Script non terminato entro {timeout} secondi"
+            break
+        except Exception as e:
+            report['error'] = str(e)
+            if dispatched:
+                break
+        
+        if attempt <= retries:
+            print(f"    Tentativo {attempt} fallito ({report['error']}), nuovo tentativo...")
+            time.sleep(retry_delay * attempt)
+    
+    report['duration_s'] = round(time.perf_counter() - start_time, 3)
+    return report
+
+def run_script_queue(jobs, runner, report_path=None, retries=QUEUE_RETRIES, retry_delay=QUEUE_RETRY_DELAY):
+    """Esegue i job uno dopo l'altro con un solo runner e scrive il report; restituisce il codice di uscita."""
+    print(f"Esecuzione di {len(jobs)} job in coda")
+    start_time = time.perf_counter()
+    runner.clear_log_file()
+    
+    reports = []
+    for index, job in enumerate(jobs, 1):
+        print(f"  [{index}/{len(jobs)}] {Path(job['script']).name}")
+        report = run_queued_job(runner, job, retries, retry_delay)
+        reports.append(report)
+        print(f"    {report['status']}: {report['function'] or '-'} ({report['attempts']} tentativi, "
+              f"{report['duration_s']:.1f}s)")
+        if report['error'] and report['status'] != 'ok':
+            print(f"     - {report['error']}")
+    
+    summary = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'duration_s': round(time.perf_counter() - start_time, 3),
+        'jobs_total': len(reports),
+        'jobs_ok': sum(1 for report in reports if report['status'] == 'ok'),
+        'jobs': reports,
+    }
+    
+    report_json = json.dumps(summary, ensure_ascii=False, indent=2)
+    if report_path:
+        Path(report_path).write_text(report_json, encoding='utf-8')
+        print(f"Report salvato in: {report_path}")
+    else:
+        print(report_json)
+    
+    return 0 if summary['jobs_ok'] == summary['jobs_total'] else 1
+
+def run_queue_mode(args):
+    """Modalità coda non interattiva: prepara runner e Altium, poi esegue i job."""
+    jobs = []
+    try:
+        for job_file in args.queue or []:
+            jobs.extend(parse_job_file(job_file))
+    except Exception as e:
+        print(f"Errore nella lettura della coda: {e}")
+        return 1
+    for job in args.job or []:
+        jobs.append({'script': job[0], 'function': job[1] if len(job) > 1 else None,
+                     'project': job[2] if len(job) > 2 else None})
+    if not jobs:
+        print("Nessun job da eseguire.")
+        return 1
+    
+    runner = create_runner(args.simulate, args.simulate_failures, args.simulate_timeouts)
+    if runner is None:
+        return 1
+    
+    return run_script_queue(jobs, runner, args.report, retries=args.retries)
+
+def get_daemon_address():
+    """Indirizzo locale del demone: named pipe su Windows, socket Unix nella cartella temporanea altrove."""
+    if sys.platform == 'win32':
+        return rf'\\.\pipe\{DAEMON_PIPE_NAME}'
+    import tempfile
+    return os.path.join(tempfile.gettempdir(), f'{DAEMON_PIPE_NAME}.sock')
+
+def load_daemon_key(create=False):
+    """Legge (o crea, leggibile solo dall'utente) la chiave che autentica i client del demone."""
+    if create and not DAEMON_KEY_PATH.exists():
+        fd = os.open(DAEMON_KEY_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(os.urandom(32))
+    return DAEMON_KEY_PATH.read_bytes()
+
+def send_daemon_request(request, address=None):
+    """Invia una richiesta al demone e restituisce la risposta (None se il demone non è raggiungibile)."""
+    from multiprocessing.connection import Client
+    from multiprocessing import AuthenticationError
+    try:
+        connection = Client(address or get_daemon_address(), authkey=load_daemon_key())
+    except (OSError, EOFError, AuthenticationError):
+        return None
+    with connection:
+        connection.send(request)
+        return connection.recv()
+
+def validate_daemon_job(request):
+    """Controlla job e tentativi di una richiesta submit; restituisce il messaggio di errore o None."""
+    job = request.get('job')
+    if not isinstance(job, dict) or not isinstance(job.get('script'), str) or not job['script']:
+        return "Richiesta submit senza job valido (serve almeno 'script')"
+    for key in ('function', 'project'):
+        if job.get(key) is not None and not isinstance(job[key], str):
+            return f"Valore non valido per '{key}': serve un testo"
+    timeout = job.get('timeout')
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        return "Timeout non valido: serve un numero di secondi positivo"
+    retries = request.get('retries', QUEUE_RETRIES)
+    if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+        return "Numero di tentativi non valido"
+    return None
+
+def handle_daemon_request(request, runner, state):
+    """Esegue una richiesta ricevuta dal demone e restituisce la risposta.
+    
+    Le richieste non valide ricevono una risposta di errore invece di interrompere il demone.
+    """
+    if not isinstance(request, dict):
+        return {'status': 'errore', 'error': f"Richiesta non valida: {type(request).__name__}"}
+    action = request.get('action')
+    if action == 'submit':
+        # Controlli prima dell'invio: un job malformato non deve arrivare ad Altium
+        error = validate_daemon_job(request)
+        if error:
+            return {'status': 'errore', 'error': error}
+        report = run_queued_job(runner, request['job'], request.get('retries', QUEUE_RETRIES))
+        state['jobs'] += 1
+        print(f"  [{datetime.now():%H:%M:%S}] {report['status']}: {Path(report['script']).name} "
+              f"{report['function'] or '-'} (invio in {report['dispatch_ms'] if report['dispatch_ms'] is not None else '-'} ms, {report['duration_s']:.1f}s)")
+        return {'status': 'ok', 'report': report}
+    if action == 'ping':
+        return {'status': 'ok', 'pid': os.getpid(), 'jobs': state['jobs'],
+                'uptime_s': round(time.monotonic() - state['started'], 1)}
+    if action == 'stop':
+        state['running'] = False
+        return {'status': 'ok'}
+    return {'status': 'errore', 'error': f"Azione sconosciuta: {action}"}
+
+def is_stale_daemon_socket(address):
+    """True se il socket Unix esiste ma nessun processo è in ascolto (connessione rifiutata)."""
+    import socket
+    probe = socket.socket(socket.AF_UNIX)
+    try:
+        probe.connect(address)
+    except ConnectionRefusedError:
+        return True
+    except OSError:
+        return False
+    finally:
+        probe.close()
+    return False
+
+def run_daemon(runner, address=None):
+    """Resta in ascolto sull'indirizzo locale ed esegue i job ricevuti con il runner già pronto.
+    
+    I job vengono eseguiti uno alla volta nell'ordine di arrivo; il client resta in
+    attesa del report del proprio job. Termina con Ctrl+C o con --daemon-stop.
+    """
+    from multiprocessing.connection import Listener
+    from multiprocessing import AuthenticationError
+    
+    address = address or get_daemon_address()
+    if DAEMON_KEY_PATH.exists() and send_daemon_request({'action': 'ping'}, address) is not None:
+        print(f"Il demone è già in esecuzione su {address}")
+        return 1
+    if sys.platform != 'win32' and os.path.exists(address):
+        # Si rimuove solo un socket rimasto da un'esecuzione interrotta: se qualcuno è in
+        # ascolto (anche con un'altra chiave) il socket appartiene a un demone attivo
+        if not is_stale_daemon_socket(address):
+            print(f"L'indirizzo {address} è in uso da un altro processo: demone non avviato")
+            return 1
+        os.remove(address)
+    
+    listener = Listener(address, authkey=load_daemon_key(create=True))
+    state = {'started': time.monotonic(), 'jobs': 0, 'running': True}
+    print(f"Demone in ascolto su {address} (Ctrl+C per terminare)")
+    
+    try:
+        while state['running']:
+            try:
+                connection = listener.accept()
+            except (AuthenticationError, OSError, EOFError) as e:
+                print(f"  Connessione rifiutata: {e}")
+                continue
+            with connection:
+                try:
+                    request = connection.recv()
+                    connection.send(handle_daemon_request(request, runner, state))
+                except (EOFError, OSError):
+                    continue
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.close()
+    
+    print(f"Demone terminato dopo {state['jobs']} job.")
+    return 0
+
+def run_client_mode(args):
+    """Client del demone: invia un job (--submit) o un comando (--daemon-status, --daemon-stop)."""
+    if args.submit:
+        job = {'script': str(resolve_script_path(args.submit[0])),
+               'function': args.submit[1] if len(args.submit) > 1 else None,
+               'project': args.submit[2] if len(args.submit) > 2 else None}
+        request = {'action': 'submit', 'job': job, 'retries': args.retries}
+    else:
+        request = {'action': 'stop' if args.daemon_stop else 'ping'}
+    
+    start_time = time.perf_counter()
+    response = send_daemon_request(request)
+    if response is None:
+        print(f"Demone non raggiungibile su {get_daemon_address()}: avvialo con --daemon")
+        return 1
+    if response['status'] != 'ok':
+        print(f"Richiesta rifiutata dal demone: {response['error']}")
+        return 1
+    
+    if args.submit:
+        report = response['report']
+        print(f"{report['status']}: {report['function'] or '-'} ({report['attempts']} tentativi, "
+              f"invio in {report['dispatch_ms'] if report['dispatch_ms'] is not None else '-'} ms, totale {(time.perf_counter() - start_time) * 1000:.1f} ms)")
+        if report['error'] and report['status'] != 'ok':
+            print(f" - {report['error']}")
+        return 0 if report['status'] == 'ok' else 1
+    
+    if args.daemon_stop:
+        print("Demone arrestato.")
+    else:
+        print(f"Demone attivo (PID {response['pid']}): {response['jobs']} job eseguiti, "
+              f"in esecuzione da {response['uptime_s']}s")
+    return 0
+
+def create_runner(simulate=False, failures=None, timeouts=None):
+    """Prepara il runner: controlli su PyAltiumRun e Altium eseguiti una sola volta.
+    
+    Con simulate si usa SimulatedAltiumRun con gli errori e i timeout da simulare.
+    """
+    if simulate:
+        return SimulatedAltiumRun(failures, timeouts)
+    
+    try:
+        from PyAltiumRun.AltiumRun import AltiumRun
+    except ImportError:
+        if not install_pyaltiumrun():
+            return None
+        from PyAltiumRun.AltiumRun import AltiumRun
+    
+    # Senza un'istanza già aperta PyAltiumRun avvierebbe e chiuderebbe Altium a ogni job
+    if not check_altium_running() and not launch_altium():
+        print("Impossibile avviare Altium Designer.")
+        return None
+    return AltiumRun(use_internal_logger=True)
+
+def parse_simulated_count(value):
+    """Converte 'FUNZIONE=N' (o solo 'FUNZIONE', N = 1) in (funzione, N) per le opzioni di simulazione."""
+    function_name, _, count = value.partition('=')
+    if not function_name:
+        raise argparse.ArgumentTypeError(f"funzione mancante in '{value}'")
+    try:
+        return function_name, int(count or 1)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"numero non valido in '{value}'")
+
+def parse_arguments(argv=None):
+    """Legge le opzioni da riga di comando (senza opzioni: menu interattivo)."""
+    parser = argparse.ArgumentParser(description="Esegue script DelphiScript in Altium Designer tramite PyAltiumRun.")
+    parser.add_argument('--queue', nargs='+', metavar='FILE',
+                        help="Esegue senza interazione i job elencati nei file (.json o righe 'script;funzione;progetto')")
+    parser.add_argument('--job', nargs='+', action='append', metavar=('SCRIPT', 'FUNZIONE'),
+                        help="Aggiunge un job alla coda: SCRIPT [FUNZIONE [PROGETTO]] (ripetibile)")
+    parser.add_argument('--retries', type=int, default=QUEUE_RETRIES,
+                        help=f"Nuovi tentativi per i job falliti per errori temporanei (default: {QUEUE_RETRIES})")
+    parser.add_argument('--report', metavar='FILE',
+                        help="File JSON in cui salvare il report dei job (default: stampa a video)")
+    parser.add_argument('--simulate', action='store_true',
+                        help="Esegue la coda o il demone con un runner simulato, senza Altium Designer")
+    parser.add_argument('--simulate-failures', type=parse_simulated_count, action='append', metavar='FUNZIONE=N',
+                        help="Con --simulate: i primi N invii di FUNZIONE falliscono prima di raggiungere Altium "
+                             "(vengono ritentati; ripetibile)")
+    parser.add_argument('--simulate-timeouts', type=parse_simulated_count, action='append', metavar='FUNZIONE=N',
+                        help="Con --simulate: le prime N esecuzioni di FUNZIONE non terminano (timeout, senza "
+                             "nuovi tentativi; ripetibile)")
+    parser.add_argument('--daemon', action='store_true',
+                        help="Resta in esecuzione con il runner pronto e accetta job dai client locali")
+    parser.add_argument('--submit', nargs='+', metavar=('SCRIPT', 'FUNZIONE'),
+                        help="Invia un job al demone e attende il risultato: SCRIPT [FUNZIONE [PROGETTO]]")
+    parser.add_argument('--daemon-status', action='store_true', help="Mostra lo stato del demone")
+    parser.add_argument('--daemon-stop', action='store_true', help="Arresta il demone")
+    args = parser.parse_args(argv)
+    args.simulate_failures = dict(args.simulate_failures or [])
+    args.simulate_timeouts = dict(args.simulate_timeouts or [])
+    return args
+
+def main(argv=None):
+    args = parse_arguments(argv)
+    if args.submit or args.daemon_status or args.daemon_stop:
+        sys.exit(run_client_mode(args))
+    if args.daemon:
+        runner = create_runner(args.simulate, args.simulate_failures, args.simulate_timeouts)
+        sys.exit(run_daemon(runner) if runner else 1)
+    if args.queue or args.job:
+        sys.exit(run_queue_mode(args))
+    
     print("PyAltiumRun - Gestore Script Altium Designer")
     print("Versione 1.0\n")
     
@@ -336,7 +1510,7 @@ def main():
     # Loop principale dell'interfaccia
     while True:
         # Elenca gli script disponibili
-        scripts = list_available_scripts()
+        scripts = list_available_scripts(scripts_dir)
         scripts = display_script_menu(scripts)
         
         if not scripts:
@@ -0,0 +1,103 @@
+"""Test del convertitore certificati su corpus sintetici generati dal benchmark."""
+
+import contextlib
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import benchmark_certificati
+import converti_certificati_pdf as converter
+
+
+# Corpus piccolo e grande per il controllo di memoria e segmenti volutamente piccoli,
+# così anche qualche centinaio di certificati attraversa molti segmenti
+STREAM_SIZES = (60, 300)
+STREAM_TEST_SEGMENT = 20
+STREAM_GROWTH_LIMIT_MB = 0.5
+
+
+@pytest.fixture(scope='module')
+def corpus_root(tmp_path_factory):
+    return tmp_path_factory.mktemp('corpus')
+
+
+def certificates_folder(corpus_root, size):
+    workspace = benchmark_certificati.generate_corpus(corpus_root, size)
+    return next(Path(workspace).glob('Clienti/*/*/Certificati'))
+
+
+def stream_certificates(folder, output_path, segment_size=STREAM_TEST_SEGMENT):
+    summary = {'total': 0, 'problematic': []}
+    with contextlib.redirect_stdout(io.StringIO()):
+        records = converter.iter_streamed_records(folder, False, summary)
+        return converter.render_streamed_segments(records, output_path, 'canvas', 'default', segment_size)
+
+
+def test_streaming_memory_does_not_grow_with_corpus(corpus_root, tmp_path):
+    small, large = (certificates_folder(corpus_root, size) for size in STREAM_SIZES)
+    output_path = tmp_path / 'stream.pdf'
+    
+    # Primo giro fuori misura: import differiti e cache di ReportLab
+    stream_certificates(large, output_path)
+    
+    peaks = []
+    tracemalloc.start()
+    try:
+        for folder in (small, large):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            successful, failed = stream_certificates(folder, output_path)
+            peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / (1024 * 1024))
+            assert successful > 0
+    finally:
+        tracemalloc.stop()
+    
+    growth = peaks[1] - peaks[0]
+    assert growth < STREAM_GROWTH_LIMIT_MB, f"picco {peaks[0]:.2f} MB -> {peaks[1]:.2f} MB"
+
+
+def test_streamed_pdf_contains_every_page(corpus_root, tmp_path):
+    from pypdf import PdfReader
+    
+    output_path = tmp_path / 'stream.pdf'
+    successful, failed = stream_certificates(certificates_folder(corpus_root, STREAM_SIZES[0]), output_path)
+    
+    reader = PdfReader(output_path, strict=True)
+    assert successful + failed == STREAM_SIZES[0]
+    assert len(reader.pages) >= successful
+
+
+def test_incremental_pages_rebuilt_when_layout_changes(tmp_path, monkeypatch):
+    folder = certificates_folder(tmp_path, 12)
+    output_path = tmp_path / 'incrementale.pdf'
+    
+    def build():
+        stats = {}
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert converter.create_incremental_pdf(folder, output_path, renderer='canvas', stats=stats)
+        return stats
+    
+    first = build()
+    assert first['rendered'] > 0 and first['reused'] == 0
+    assert build() == dict(first, reused=first['rendered'], rendered=0)
+    
+    monkeypatch.setattr(converter, 'LAYOUT_VERSION', converter.LAYOUT_VERSION + 1)
+    assert build() == first
+    pages = list((folder.parent / converter.INCREMENTAL_CACHE_FOLDER / 'pagine').glob('*.pdf'))
+    assert len(pages) == first['rendered']
+
+
+def test_component_index_does_not_fill_certificate_cache(tmp_path):
+    folder = certificates_folder(tmp_path, 12)
+    converter.clear_certificate_cache()
+    
+    with contextlib.redirect_stdout(io.StringIO()):
+        summary = converter.update_component_index(folder, tmp_path / 'indice.db')
+    
+    assert summary['added'] == 12
+    assert converter._certificate_cache == {}
@@ -0,0 +1,431 @@
+"""Test di script_manager senza Altium: installazioni su un albero di cartelle finto,
+processi finti per l'attesa dell'avvio, analisi degli script DelphiScript e runner
+simulato per coda, monitor e demone."""
+
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import script_manager
+
+
+def make_executable(root, relative_path):
+    path = root / relative_path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'MZ')
+    return str(path)
+
+
+def make_altium_tree(root):
+    """Installazioni con versioni miste: prefissi più corti, DXP/X2 e una versione sconosciuta."""
+    return {
+        'ad24': make_executable(root, 'AD24/X2.exe'),
+        'ad24_1': make_executable(root, 'AD24.1/X2.exe'),
+        'ad25': make_executable(root, 'AD25/X2.exe'),
+        'ad25_dxp': make_executable(root, 'AD25/DXP.exe'),
+        'ad25_3': make_executable(root, 'AltiumDesigner25.3/bin/X2.exe'),
+        'custom': make_executable(root, 'Custom/X2.exe'),
+    }
+
+
+def find(root, preferred_version):
+    return script_manager.find_altium_installation([str(root)], preferred_version)
+
+
+def test_select_prefers_longest_version_with_same_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_manager, 'ALTIUM_REGISTRY_PATH', tmp_path / 'registry.json')
+    paths = make_altium_tree(tmp_path / 'Altium')
+    
+    assert find(tmp_path / 'Altium', '25') == paths['ad25_3']
+    assert find(tmp_path / 'Altium', '24') == paths['ad24_1']
+
+
+def test_select_never_prefers_unknown_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_manager, 'ALTIUM_REGISTRY_PATH', tmp_path / 'registry.json')
+    paths = make_altium_tree(tmp_path / 'Altium')
+    
+    # Nessuna installazione della 26: vince la versione nota più alta, non Custom
+    assert find(tmp_path / 'Altium', '26') == paths['ad25_3']
+    
+    installations = script_manager.scan_altium_installations([str(tmp_path / 'Altium')])
+    unknown_only = [installation for installation in installations if not installation['version']]
+    assert script_manager.select_altium_installation(unknown_only, '26')['path'] == paths['custom']
+
+
+def test_select_prefers_x2_over_dxp(tmp_path):
+    paths = make_altium_tree(tmp_path / 'Altium')
+    installations = script_manager.scan_altium_installations([str(tmp_path / 'Altium')])
+    same_version = [installation for installation in installations if installation['version'] == [25]]
+    
+    assert script_manager.select_altium_installation(same_version, '25')['path'] == paths['ad25']
+
+
+def test_registry_is_reused_until_tree_changes(tmp_path, monkeypatch):
+    registry_path = tmp_path / 'registry.json'
+    monkeypatch.setattr(script_manager, 'ALTIUM_REGISTRY_PATH', registry_path)
+    root = tmp_path / 'Altium'
+    paths = make_altium_tree(root)
+    
+    assert find(root, '25') == paths['ad25_3']
+    assert registry_path.exists()
+    
+    scans = []
+    original_scan = script_manager.scan_altium_installations
+    def counting_scan(*args, **kwargs):
+        scans.append(args)
+        return original_scan(*args, **kwargs)
+    monkeypatch.setattr(script_manager, 'scan_altium_installations', counting_scan)
+    
+    assert find(root, '25') == paths['ad25_3']
+    assert scans == []
+    
+    # Una nuova installazione cambia la data di modifica della cartella di ricerca
+    newer = make_executable(root, 'AltiumDesigner25.4/bin/X2.exe')
+    os.utime(root, ns=(1, 1))
+    assert find(root, '25') == newer
+    assert len(scans) == 1
+
+
+# Processo finto: consuma CPU per busy_s secondi, poi resta inattivo
+BUSY_THEN_IDLE = "import time\nend = time.time() + {busy}\nwhile time.time() < end: pass\ntime.sleep(30)"
+# Launcher finto: avvia il processo vero (stampa il suo PID) e termina subito dopo
+LAUNCHER = ("import subprocess, sys, time\n"
+            "child = subprocess.Popen([sys.executable, '-c', {child!r}])\n"
+            "print(child.pid, flush=True)\ntime.sleep(0.3)")
+
+
+def wait_ready(pid, timeout=15):
+    return script_manager.wait_for_process_ready(pid, timeout=timeout, initial_interval=0.05, max_interval=0.2)
+
+
+def test_ready_detected_when_cpu_goes_idle():
+    process = subprocess.Popen([sys.executable, '-c', BUSY_THEN_IDLE.format(busy=0.5)])
+    try:
+        result = wait_ready(process.pid)
+    finally:
+        process.kill()
+        process.wait()
+    
+    assert result['ready'] and result['status'] == 'pronto'
+    assert result['pid'] == process.pid
+    assert result['elapsed_s'] >= 0.5
+    assert result['polls'] >= script_manager.READY_IDLE_POLLS + 1
+
+
+def test_launcher_exiting_without_children_is_reported():
+    # Termina mentre è ancora occupato, prima di poter risultare pronto
+    busy_then_exit = "import time\nend = time.time() + 0.4\nwhile time.time() < end: pass"
+    process = subprocess.Popen([sys.executable, '-c', busy_then_exit])
+    try:
+        result = wait_ready(process.pid)
+    finally:
+        process.wait()
+    
+    assert not result['ready']
+    assert result['status'] == 'terminato'
+
+
+def test_launcher_exiting_early_hands_over_to_child():
+    launcher = subprocess.Popen([sys.executable, '-c', LAUNCHER.format(child=BUSY_THEN_IDLE.format(busy=0.8))],
+                                stdout=subprocess.PIPE, text=True)
+    child_pid = int(launcher.stdout.readline())
+    try:
+        result = wait_ready(launcher.pid)
+    finally:
+        launcher.wait()
+        launcher.stdout.close()
+        try:
+            os.kill(child_pid, 9)
+        except OSError:
+            pass
+    
+    assert result['ready']
+    assert result['pid'] == child_pid
+
+
+def make_script(tmp_path, name='prova.pas'):
+    script = tmp_path / name
+    script.write_text("procedure Esegui;\nbegin\nend;\n", encoding='utf-8')
+    return script
+
+
+def run_job(runner, script, retries=2, timeout=5):
+    job = {'script': str(script), 'function': 'Esegui', 'timeout': timeout}
+    return script_manager.run_queued_job(runner, job, retries=retries, retry_delay=0)
+
+
+def dispatched_runs(runner):
+    return [call for call in runner.calls if call[0] == 'run']
+
+
+def test_queue_retries_failure_before_dispatch(tmp_path):
+    runner = script_manager.SimulatedAltiumRun(failures={'Esegui': 1}, duration=0.05)
+    report = run_job(runner, make_script(tmp_path))
+    
+    assert report['status'] == 'ok'
+    assert report['attempts'] == 2
+    assert report['error'] is None
+    assert report['dispatch_ms'] is not None
+    assert report['start_latency_s'] >= 0 and report['script_s'] >= 0
+    assert len(dispatched_runs(runner)) == 1
+
+
+def test_queue_gives_up_after_retries_before_dispatch(tmp_path):
+    runner = script_manager.SimulatedAltiumRun(failures={'Esegui': 5}, duration=0.05)
+    report = run_job(runner, make_script(tmp_path), retries=1)
+    
+    assert report['status'] == 'errore'
+    assert report['attempts'] == 2
+    assert 'avvio di Altium non riuscito' in report['error']
+    assert dispatched_runs(runner) == []
+
+
+def test_queue_does_not_retry_timeout_after_dispatch(tmp_path):
+    runner = script_manager.SimulatedAltiumRun(timeouts={'Esegui': 1}, duration=0.05)
+    report = run_job(runner, make_script(tmp_path), timeout=0.3)
+    
+    assert report['status'] == 'timeout'
+    assert report['attempts'] == 1
+    assert report['error'] == "Script non terminato entro 0.3 secondi"
+    assert report['script_s'] is None
+    assert len(dispatched_runs(runner)) == 1
+
+
+def test_queue_reports_missing_script(tmp_path):
+    runner = script_manager.SimulatedAltiumRun()
+    report = run_job(runner, tmp_path / 'mancante.pas')
+    
+    assert report['status'] == 'errore'
+    assert report['attempts'] == 0
+    assert report['error'] == f"Script non trovato: {tmp_path / 'mancante.pas'}"
+    assert report['dispatch_ms'] is None
+    assert dispatched_runs(runner) == []
+
+
+def daemon_state():
+    return {'started': time.monotonic(), 'jobs': 0, 'running': True}
+
+
+def test_daemon_runs_valid_submit(tmp_path):
+    runner = script_manager.SimulatedAltiumRun(duration=0.05)
+    state = daemon_state()
+    request = {'action': 'submit', 'retries': 0,
+               'job': {'script': str(make_script(tmp_path)), 'function': 'Esegui', 'project': None, 'timeout': 5}}
+    
+    response = script_manager.handle_daemon_request(request, runner, state)
+    
+    assert response['status'] == 'ok'
+    assert response['report']['status'] == 'ok'
+    assert response['report']['function'] == 'Esegui'
+    assert state['jobs'] == 1
+
+
+def test_daemon_ping_and_stop():
+    runner = script_manager.SimulatedAltiumRun()
+    state = daemon_state()
+    
+    ping = script_manager.handle_daemon_request({'action': 'ping'}, runner, state)
+    assert ping['status'] == 'ok' and ping['pid'] == os.getpid() and ping['jobs'] == 0
+    
+    assert script_manager.handle_daemon_request({'action': 'stop'}, runner, state) == {'status': 'ok'}
+    assert state['running'] is False
+
+
+@pytest.mark.parametrize('request_data', [
+    None,
+    ['submit'],
+    'submit',
+    {'action': 'sconosciuta'},
+    {'action': 'submit'},
+    {'action': 'submit', 'job': 'prova.pas'},
+    {'action': 'submit', 'job': {}},
+    {'action': 'submit', 'job': {'script': 5}},
+    {'action': 'submit', 'job': {'script': 'prova.pas'}, 'retries': 'due'},
+    {'action': 'submit', 'job': {'script': 'prova.pas'}, 'retries': -1},
+    {'action': 'submit', 'job': {'script': 'prova.pas', 'timeout': 'abc'}},
+    {'action': 'submit', 'job': {'script': 'prova.pas', 'timeout': 0}},
+    {'action': 'submit', 'job': {'script': 'prova.pas', 'function': ['Esegui']}},
+    {'action': 'submit', 'job': {'script': 'prova.pas', 'project': 3}},
+])
+def test_daemon_rejects_invalid_requests(request_data):
+    runner = script_manager.SimulatedAltiumRun()
+    state = daemon_state()
+    
+    response = script_manager.handle_daemon_request(request_data, runner, state)
+    
+    assert response['status'] == 'errore' and response['error']
+    assert runner.calls == [] and state['jobs'] == 0
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason="socket Unix")
+def test_daemon_round_trip_on_unix_socket(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_manager, 'DAEMON_KEY_PATH', tmp_path / 'daemon.key')
+    # Percorso corto: i socket Unix hanno un limite di circa 100 caratteri
+    socket_dir = tempfile.mkdtemp(prefix='sm_')
+    address = os.path.join(socket_dir, 'daemon.sock')
+    runner = script_manager.SimulatedAltiumRun(duration=0.05)
+    daemon = threading.Thread(target=script_manager.run_daemon, args=(runner, address), daemon=True)
+    daemon.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not os.path.exists(address) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        
+        job = {'script': str(make_script(tmp_path)), 'function': 'Esegui', 'timeout': 5}
+        response = script_manager.send_daemon_request({'action': 'submit', 'job': job, 'retries': 0}, address)
+        assert response['status'] == 'ok' and response['report']['status'] == 'ok'
+        
+        rejected = script_manager.send_daemon_request({'action': 'submit', 'job': {'script': 'x', 'timeout': 'abc'}},
+                                                      address)
+        assert rejected['status'] == 'errore'
+        
+        assert script_manager.send_daemon_request({'action': 'ping'}, address)['jobs'] == 1
+        assert script_manager.send_daemon_request({'action': 'stop'}, address) == {'status': 'ok'}
+        daemon.join(5)
+        assert not daemon.is_alive()
+    finally:
+        shutil.rmtree(socket_dir, ignore_errors=True)
+
+
+# (sorgente, routine attese come (nome, forward, annidata, parametri), punto d'ingresso)
+DELPHI_CASES = [
+    pytest.param("{ procedure Falsa; }\nprocedure Vera;\nbegin\nend;\n",
+                 [('Vera', False, False, False)], 'Vera', id='commento-graffe'),
+    pytest.param("(* procedure Falsa;\n*)\nprocedure Vera;\nbegin\nend;\n",
+                 [('Vera', False, False, False)], 'Vera', id='commento-parentesi'),
+    pytest.param("// procedure Falsa;\nprocedure Vera;\nbegin\nend;\n",
+                 [('Vera', False, False, False)], 'Vera', id='commento-riga'),
+    pytest.param("procedure Vera;\nbegin\n  ShowMessage('procedure Falsa; l''ultima { (* //');\nend;\n",
+                 [('Vera', False, False, False)], 'Vera', id='stringa-apici-doppi'),
+    pytest.param("procedure Avvia; forward;\nprocedure Aiuto(X: Integer);\nbegin\nend;\n"
+                 "procedure Avvia;\nbegin\n  Aiuto(1);\nend;\nprocedure Dopo;\nbegin\nend;\n",
+                 [('Avvia', True, False, False), ('Aiuto', False, False, True),
+                  ('Avvia', False, False, False), ('Dopo', False, False, False)], 'Avvia', id='forward'),
+    pytest.param("procedure Esterna;\n  procedure Interna;\n  begin\n  end;\nbegin\n  Interna;\nend;\n"
+                 "procedure Ultima(A: Integer);\nbegin\nend;\n",
+                 [('Esterna', False, False, False), ('Interna', False, True, False),
+                  ('Ultima', False, False, True)], 'Esterna', id='annidata'),
+    pytest.param("procedure Prima;\nbegin\n  try\n    case X of 1: begin end; end;\n  finally\n  end;\nend;\n"
+                 "procedure Seconda;\nbegin\nend;\n",
+                 [('Prima', False, False, False), ('Seconda', False, False, False)], 'Seconda', id='blocchi'),
+    pytest.param("type TProc = procedure;\nvar P: procedure;\nfunction Calcola: Integer;\nbegin\n  Result := 1;\nend;\n",
+                 [('Calcola', False, False, False)], 'Calcola', id='tipo-procedurale'),
+    pytest.param("PROCEDURE RunMe;\nBEGIN\nEND;\n",
+                 [('RunMe', False, False, False)], 'RunMe', id='maiuscole'),
+]
+
+
+@pytest.mark.parametrize('source, expected, entry_point', DELPHI_CASES)
+def test_parse_delphiscript(source, expected, entry_point):
+    routines = script_manager.parse_delphiscript(source)
+    
+    assert [(r['name'], r['forward'], r['nested'], r['params']) for r in routines] == expected
+    assert script_manager.choose_entry_point(routines) == entry_point
+
+
+def test_script_index_records_project_membership(tmp_path, monkeypatch):
+    monkeypatch.setattr(script_manager, 'SCRIPT_INDEX_PATH', tmp_path / 'indice.json')
+    scripts_dir = tmp_path / 'Scripts'
+    (scripts_dir / 'Progetto').mkdir(parents=True)
+    (scripts_dir / 'Progetto' / 'uno.pas').write_text("procedure Uno;\nbegin\nend;\n", encoding='utf-8')
+    (scripts_dir / 'Progetto' / 'Comune.pas').write_text("procedure Comune;\nbegin\nend;\n", encoding='utf-8')
+    (scripts_dir / 'solo.pas').write_text("procedure Solo;\nbegin\nend;\n", encoding='utf-8')
+    (scripts_dir / 'Progetto' / 'progetto.PRJSCR').write_text(
+        "[Document1]\nDocumentPath=uno.pas\n\n[Document2]\nDocumentPath=..\\Progetto\\Comune.pas\n", encoding='utf-8')
+    
+    scripts = {Path(info['path']).name: info for info in script_manager.build_script_index(scripts_dir).values()}
+    
+    project = str(scripts_dir / 'Progetto' / 'progetto.PRJSCR')
+    assert sorted(scripts) == ['Comune.pas', 'solo.pas', 'uno.pas']
+    assert scripts['uno.pas']['projects'] == [project]
+    assert scripts['Comune.pas']['projects'] == [project]
+    assert scripts['Comune.pas']['entry_point'] == 'Comune'
+    assert scripts['solo.pas']['projects'] == []
+    
+    listed = script_manager.list_available_scripts(scripts_dir)
+    assert [info['label'] for info in listed] == ['Progetto/Comune.pas', 'Progetto/uno.pas', 'solo.pas']
+    
+    # Il menu usa le voci già lette: nessuna nuova scansione della cartella
+    def no_rescan(*args, **kwargs):
+        raise AssertionError("indice ricostruito dal menu")
+    monkeypatch.setattr(script_manager, 'build_script_index', no_rescan)
+    assert script_manager.display_script_menu(listed) == [Path(info['path']) for info in listed]
+
+
+def log_line(moment, message):
+    return f"[{moment:%d/%m/%y %H:%M:%S}.{moment.microsecond // 1000:03}]: {message}\r\n".encode('cp1252')
+
+
+def test_log_read_incrementally_from_saved_offset(tmp_path):
+    log_path = tmp_path / 'log.txt'
+    first = log_line(datetime(2026, 10, 18, 9, 30, 1, 250000), 'Starting script')
+    second = log_line(datetime(2026, 10, 18, 9, 30, 2, 5000), 'Componenti: 12')
+    third = log_line(datetime(2026, 10, 18, 9, 30, 3, 999000), 'Fine perché completato')
+    state = {'offset': 0, 'partial': b''}
+    
+    log_path.write_bytes(first + second[:9])
+    assert script_manager.read_new_log_lines(log_path, state) == [
+        (datetime(2026, 10, 18, 9, 30, 1, 250000), 'Starting script')]
+    assert state['offset'] == len(first) + 9
+    assert state['partial'] == second[:9]
+    
+    # Secondo blocco: si riparte dall'offset salvato e si completa la riga spezzata
+    with open(log_path, 'ab') as f:
+        f.write(second[9:] + third)
+    assert script_manager.read_new_log_lines(log_path, state) == [
+        (datetime(2026, 10, 18, 9, 30, 2, 5000), 'Componenti: 12'),
+        (datetime(2026, 10, 18, 9, 30, 3, 999000), 'Fine perché completato')]
+    assert state['offset'] == log_path.stat().st_size
+    assert script_manager.read_new_log_lines(log_path, state) == []
+    
+    # Log svuotato (clear_log_file): la lettura riparte dall'inizio
+    log_path.write_bytes(first)
+    assert len(script_manager.read_new_log_lines(log_path, state)) == 1
+
+
+def monitor(data_dir, timeout):
+    return asyncio.run(script_manager.monitor_script_completion(data_dir, datetime.now(), timeout, interval=0.01))
+
+
+def test_monitor_completes_when_sentinel_is_deleted(tmp_path):
+    sentinel = tmp_path / 'running'
+    sentinel.touch()
+    
+    def altium():
+        with open(tmp_path / 'log.txt', 'ab') as f:
+            f.write(log_line(datetime.now(), 'Starting script'))
+        time.sleep(0.2)
+        with open(tmp_path / 'log.txt', 'ab') as f:
+            f.write(log_line(datetime.now(), 'Fine'))
+        sentinel.unlink()
+    
+    worker = threading.Thread(target=altium)
+    worker.start()
+    completion = monitor(tmp_path, timeout=5)
+    worker.join()
+    
+    assert completion['status'] == 'completato'
+    assert completion['log_lines'] == 2 and completion['last_message'] == 'Fine'
+    assert completion['start_latency_s'] >= 0
+    assert completion['script_s'] >= 0.1
+
+
+def test_monitor_times_out_when_sentinel_stays(tmp_path):
+    (tmp_path / 'running').touch()
+    
+    completion = monitor(tmp_path, timeout=0.2)
+    
+    assert completion['status'] == 'timeout'
+    assert completion['finished_at'] is None and completion['script_s'] is None
+    assert completion['total_s'] >= 0.2